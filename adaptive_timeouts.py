@@ -0,0 +1,129 @@
+"""
+Adaptive wait timeouts learned from the run history.
+
+With AMZ_ADAPTIVE_TIMEOUTS=1 every element wait that passes an explicit
+timeout (wait_for_element_visible(sel, timeout=15), ...) gets a timeout
+learned from how long that same wait on that selector has taken in the same
+test class before:
+
+    timeout = p99 of the past waits x AMZ_ADAPTIVE_MARGIN
+
+It never goes below AMZ_ADAPTIVE_FLOOR seconds or above the hard-coded value.
+A wait that timed out counts as taking its full timeout, so a selector
+that sometimes needs longer than its timeout isn't learned from its fast
+runs alone. A selector needs AMZ_ADAPTIVE_MIN_SAMPLES waits from the last
+AMZ_ADAPTIVE_DAYS days (see run_history.py) before its timeout is learned.
+Until then the hard-coded value is used. The same goes for the rest of the
+run once a selector has missed its learned timeout.
+
+Waits inside helpers (open_search_results, walk_pagination, ...) are learned
+too, as run_history stores the waits nested in a step.
+
+A missing element then fails in seconds instead of sitting out the full 15s.
+Waits that took longer than their learned p99 but still made it are listed
+at the end of the run, so slow creep shows up before it turns into failures.
+"""
+
+import functools
+import os
+import sqlite3
+import time
+
+import run_history
+import settings
+
+# Element waits whose timeout is learned (keyed by test class + wait + selector;
+# waiting for an element to go away takes nothing like waiting for it to show)
+ADAPTIVE_STEPS = (
+    "wait_for_element_visible", "wait_for_element_present",
+    "wait_for_element_clickable", "wait_for_element_not_visible",
+)
+
+_learned = None
+
+# (suite, step, selector) that missed their learned timeout in this run
+_missed = set()
+
+# Waits slower than their learned p99 in this run, for the end-of-run summary
+slow_waits = []
+
+
+def learned():
+    """{(suite, step, selector): p99 seconds} from the run history, loaded once.
+    Timed-out waits are in there at their timeout (a lower bound)."""
+    global _learned
+    if _learned is not None:
+        return _learned
+    _learned = {}
+    if not os.path.exists(settings.RUN_HISTORY_DB):
+        return _learned
+    since = time.time() - settings.ADAPTIVE_DAYS * 86400
+    conn = sqlite3.connect(settings.RUN_HISTORY_DB)
+    try:
+        rows = conn.execute(
+            "SELECT suite, step, selector, duration_ms FROM waits WHERE at >= ? "
+            f"AND step IN ({','.join('?' * len(ADAPTIVE_STEPS))}) AND selector IS NOT NULL",
+            (since, *ADAPTIVE_STEPS),
+        ).fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        conn.close()
+    samples = {}
+    for suite, step, selector, ms in rows:
+        samples.setdefault((suite, step, selector), []).append(ms)
+    for key, values in samples.items():
+        if len(values) >= settings.ADAPTIVE_MIN_SAMPLES:
+            _learned[key] = run_history.percentile(values, 0.99) / 1000
+    return _learned
+
+
+def timeout_for(suite, step, selector, ceiling):
+    """(timeout, p99 or None) for this wait; ceiling is the hard-coded value."""
+    key = (suite, step, selector)
+    p99 = learned().get(key)
+    if p99 is None or key in _missed:
+        return ceiling, None
+    timeout = max(settings.ADAPTIVE_FLOOR, p99 * settings.ADAPTIVE_MARGIN)
+    return min(ceiling, timeout), p99
+
+
+def adaptive(name, method):
+    """Wrap a BaseCase wait so its explicit timeout is replaced by the learned one."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        selector = args[0] if args else kwargs.get("selector")
+        ceiling = kwargs.get("timeout")
+        if not isinstance(selector, str) or not ceiling:
+            return method(self, *args, **kwargs)
+        suite = run_history.suite_of(run_history.node_id(self.id()))
+        timeout, p99 = timeout_for(suite, name, selector, ceiling)
+        if p99 is None:
+            return method(self, *args, **kwargs)
+        kwargs["timeout"] = timeout
+        started = time.monotonic()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception:
+            _missed.add((suite, name, selector))
+            print(f"Adaptive timeout: {name}({selector!r}) gave up after {timeout:.1f}s "
+                  f"(p99 {p99:.2f}s x {settings.ADAPTIVE_MARGIN:g}, hard-coded {ceiling}s); "
+                  "using the hard-coded timeout for it from now on")
+            raise
+        took = time.monotonic() - started
+        if took > p99:
+            slow_waits.append((suite, name, selector, took, p99))
+        return result
+
+    return wrapper
+
+
+def summary_lines(limit=15):
+    if not slow_waits:
+        return []
+    lines = ["Waits slower than their usual p99:"]
+    for suite, step, selector, took, p99 in sorted(slow_waits, key=lambda w: w[3] / w[4],
+                                                   reverse=True)[:limit]:
+        lines.append(f"  {took:6.2f}s (p99 {p99:.2f}s)  {suite} {step}({selector!r})")
+    return lines
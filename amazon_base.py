@@ -0,0 +1,491 @@
+import os
+import time
+from urllib.parse import urlsplit
+
+from seleniumbase import BaseCase
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from seleniumbase import config as sb_config
+
+import adaptive_timeouts
+import cdp_events
+import deep_links
+import dom_probe
+import filter_matrix
+import har_capture
+import hmenu_index
+import interstitial_guard
+import locator_audit
+import memory_profile
+import page_state
+import page_waits
+import pagination
+import resource_blocking
+import run_history
+import screenshots
+import search_results
+import scroll_driver
+import settings
+import step_trace
+import storefront_replay
+import web_vitals
+from browser_pool import pool
+
+# One recording archive per process, shared by every test (record mode only)
+_archive = None
+
+_screenshot_policy = screenshots.parse_policy(settings.SCREENSHOT_POLICY)
+
+# Translate each :contains() selector to XPath once per session, not per call
+locator_audit.install_translation_cache()
+
+
+class AmazonBaseCase(BaseCase):
+    """
+    Shared base for all of our Amazon test classes.
+    Anything that every suite needs (smart waits, browser reuse, etc.) lives
+    here so the test modules can stay focused on the actual test steps.
+    """
+
+    # Homepage of the storefront under test (live site or a replay server)
+    base_url = settings.BASE_URL
+
+    # Fast mode opt-in: groups/patterns from resource_blocking.BLOCK_GROUPS.
+    # Individual tests can override it with @block_resources(...).
+    block_resources = ()
+
+    # Memory profiling (AMZ_MEMORY_PROFILE=1): heavy flows also sample every N
+    # steps. Individual tests can override it with @memory_profile.sample_every(N).
+    memory_sample_every = 0
+
+    # Deep-link opt-in: set up preconditions that aren't under test (e.g. the
+    # results page for a keyword) straight from a URL. AMZ_UI_SETUP=1 overrides.
+    deep_link_setup = False
+
+    def setUp(self):
+        self._held_screenshots = []
+        tracer = step_trace.start(self.id()) if settings.TRACE else None
+        if settings.REUSE_BROWSER:
+            pool.before_setup()
+        if settings.RECORD_ARCHIVE or settings.RESOURCE_REPORT or settings.HAR:
+            # Recording, resource accounting and HAR capture read Chrome's CDP performance log
+            sb_config.log_cdp_events = True
+        if tracer:
+            with tracer.span("browser setUp", "setup"):
+                super().setUp()
+            step_trace.hook_driver(self.driver)
+        else:
+            super().setUp()
+        if settings.REUSE_BROWSER:
+            pool.after_setup(self.driver)
+        if settings.RUN_HISTORY:
+            run_history.history.add_environment(self.driver)
+        if settings.RECORD_ARCHIVE:
+            self._start_recording()
+        self._start_fast_mode()
+        if settings.HAR:
+            self._start_har()
+        self._guarded = settings.INTERSTITIAL_GUARD and interstitial_guard.install(self.driver)
+        self._vitals = settings.VITALS and web_vitals.install(self.driver)
+        if settings.MEMORY_PROFILE:
+            self._start_memory_sampling()
+
+    def tearDown(self):
+        self._pump_cdp_events()
+        self._finish_har()
+        self._report_fast_mode()
+        self._report_interstitials()
+        self._report_vitals()
+        if settings.MEMORY_PROFILE:
+            self._finish_memory_sampling()
+        if self._held_screenshots and self.has_exception():
+            for path, png, masks in self._held_screenshots:
+                screenshots.writer(settings.SCREENSHOT_WORKERS).submit(path, png, masks)
+        self._held_screenshots = []
+        super().tearDown()
+        if _archive is not None:
+            _archive.save()
+        # With a warm browser the next test shares it, so wipe the session here.
+        # Without reuse the browser has just been closed and there is nothing to do.
+        if settings.REUSE_BROWSER:
+            pool.release(self.driver)
+        tracer = step_trace.finish(settings.TRACE_DIR)
+        if tracer and settings.RUN_HISTORY:
+            run_history.history.add_waits(self.id(), tracer)
+        if tracer:
+            split = ", ".join(
+                f"{cat} {ns / 1e9:.1f}s" for cat, ns in sorted(tracer.totals().items())
+            )
+            print(f"Step timings: {split}")
+
+    def open(self, url):
+        # Read CDP events before they get mixed up with the next page's
+        self._pump_cdp_events()
+        result = super().open(url)
+        if settings.PAGE_STATE_CHECK:
+            # A bot wall fails the test now, not after the next 15s wait
+            state = page_state.probe(self.driver, url)
+            if state["state"] in page_state.FATAL:
+                self.fail(f"Opened {url} and landed on {page_state.describe(state)}")
+        return result
+
+    def maximize_window(self):
+        # A reused browser is already maximized from the first test
+        if settings.REUSE_BROWSER and not pool.needs_maximize(self.driver):
+            return
+        super().maximize_window()
+
+    def save_screenshot(self, name, folder=None, selector=None, by="css selector"):
+        # Parallel workers each get their own sub-folder so file names never collide
+        if folder and settings.WORKER_ID:
+            folder = os.path.join(settings.REPO_ROOT, folder, settings.WORKER_ID)
+        if selector:
+            # Element screenshots are rare; let SeleniumBase crop them
+            return super().save_screenshot(name, folder, selector=selector, by=by)
+        if not name.endswith(".png"):
+            name += ".png"
+        path = os.path.join(folder, name) if folder else name
+
+        policy, rate = _screenshot_policy
+        if policy == screenshots.SAMPLED and not screenshots.is_sampled(
+            f"{self.id()}:{name}", rate
+        ):
+            return None
+        # Only the capture happens here; encoding and disk I/O run in the background
+        masks = None
+        if settings.SCREENSHOT_MASKS:
+            masks = self.driver.execute_script(
+                screenshots.MASK_JS, ", ".join(screenshots.MASK_SELECTORS)
+            )
+        png = self.driver.get_screenshot_as_png()
+        if policy == screenshots.ON_FAILURE:
+            self._held_screenshots.append((path, png, masks))
+        else:
+            screenshots.writer(settings.SCREENSHOT_WORKERS).submit(path, png, masks)
+        return path
+
+    def wait_for_page_settled(self, quiet_ms=page_waits.DEFAULT_QUIET_MS,
+                              timeout=page_waits.DEFAULT_TIMEOUT):
+        """Wait until the page stops changing instead of sleeping a fixed time."""
+        return page_waits.wait_for_page_settled(self.driver, quiet_ms, timeout)
+
+    def wait_for_element_stable(self, selector, by="css selector",
+                                stable_ms=page_waits.DEFAULT_STABLE_MS,
+                                timeout=page_waits.DEFAULT_TIMEOUT):
+        """Wait until the element is visible and has stopped moving/resizing."""
+        def find_element(remaining):
+            return self.wait_for_element_visible(selector, by=by, timeout=remaining)
+
+        return page_waits.wait_for_element_stable(
+            self.driver, find_element, stable_ms, timeout
+        )
+
+    def scroll_in_page(self, target="bottom", selector=None,
+                       step_px=scroll_driver.DEFAULT_STEP_PX,
+                       timeout=scroll_driver.DEFAULT_TIMEOUT):
+        """Scroll the window (or a scrollable element) to "top", "bottom" or a
+        pixel offset in one round trip; returns frame timings and jank stats."""
+        stats = scroll_driver.scroll(self.driver, target, selector, step_px, timeout)
+        if "error" in stats:
+            raise NoSuchElementException(stats["error"])
+        return stats
+
+    def dismiss_interstitials(self):
+        """Clear the "Continue shopping" page and similar overlays. With the
+        guard installed they are dismissed in-page as soon as they render, so
+        this costs nothing; otherwise it falls back to checking each one."""
+        if self._guarded:
+            return
+        for blocker in interstitial_guard.BLOCKERS.values():
+            self.click_if_visible(blocker)
+
+    def uses_deep_links(self):
+        return self.deep_link_setup and not settings.UI_SETUP
+
+    def open_search_results(self, keyword, page=None, refinements=None, sort=None):
+        """Land on the results page for keyword (optionally a given page, sort
+        order or refinement set) and wait for the first results.
+
+        With deep links this is one navigation. Otherwise the keyword is typed
+        into the search box of the current page and pages are clicked through;
+        sort/refinements have no UI path here and are still applied by URL."""
+        before = self.page_document()
+        if self.uses_deep_links():
+            self.open(deep_links.search_url(
+                self.base_url, keyword, page, refinements, sort
+            ))
+            self.dismiss_interstitials()
+        else:
+            search_bar = 'input[name="field-keywords"]'
+            self.wait_for_element_visible(search_bar, timeout=15)
+            self.type(search_bar, f"{keyword}\n")
+            if refinements or sort:
+                self.wait_for_element_visible(deep_links.RESULT_SELECTOR, timeout=15)
+                self.open(deep_links.search_url(
+                    self.base_url, keyword, page, refinements, sort
+                ))
+            elif page and page > 1:
+                page_link = f'a[aria-label="Go to page {page}"]'
+                self.scroll_to_element(page_link, timeout=15)
+                self.click(page_link)
+                self.wait_for_element_visible(
+                    f'span.s-pagination-selected[aria-label="Page {page}"]', timeout=15
+                )
+        self.expect_page("results", since=before)
+        self.wait_for_element_visible(deep_links.RESULT_SELECTOR, timeout=15)
+
+    def extract_search_results(self):
+        """Every result card on the page (asin, title, price, rating, sponsored)
+        from a single script call."""
+        return search_results.extract(self.driver)
+
+    def page_document(self):
+        """Id of the document in the tab (performance.timeOrigin); take it
+        before an action and hand it to expect_page(since=...)."""
+        return page_state.document_id(self.driver)
+
+    def expect_page(self, *states, timeout=15, since=None):
+        """Wait until the page is one of `states` (page_state names such as
+        "results" or "cart") and return the probe result.
+
+        Fails at once on a captcha, error page or redirect. Any other known
+        state fails as soon as it's on a new document, i.e. not the `since`
+        one from before the click/type that navigates (see page_document).
+        The page we're leaving never counts, however slow the server is;
+        without `since` only the timeout ends the wait."""
+        started = time.monotonic()
+        expected = " or ".join(states)
+        while True:
+            result = page_state.probe(self.driver, self.base_url)
+            if result["state"] in states:
+                return result
+            if result["state"] in page_state.FATAL:
+                self.fail(f"Expected a {expected} page, landed on {page_state.describe(result)}")
+            if result["state"] == "interstitial":
+                self.dismiss_interstitials()
+            elif (since is not None and result["state"] != "unknown"
+                    and result["ready"] != "loading" and result["doc"] != since):
+                self.fail(f"Expected a {expected} page, landed on {page_state.describe(result)}")
+            if time.monotonic() - started > timeout:
+                self.fail(f"Expected a {expected} page, still {page_state.describe(result)} "
+                          f"after {timeout}s")
+            time.sleep(0.1)
+
+    def verify_sort_order(self, keyword, sort, pages=None, max_disorder=0.05):
+        """Check that prices on the current results page and the following
+        pages are really ordered. sort is "price-asc" or "price-desc".
+
+        Amazon sorts by the offer it considers cheapest, which doesn't always
+        match the price shown on the card, so a small share of out-of-order
+        pairs (max_disorder) is tolerated."""
+        pages = pages or settings.SORT_CHECK_PAGES
+        results = [self.extract_search_results()]
+        for page in range(2, pages + 1):
+            self.open(deep_links.search_url(self.base_url, keyword, page=page, sort=sort))
+            self.wait_for_element_visible(deep_links.RESULT_SELECTOR, timeout=15)
+            results.append(self.extract_search_results())
+
+        repeated = search_results.duplicate_asins(results)
+        if repeated:
+            print(f"{len(repeated)} products repeated across pages: {', '.join(repeated[:5])}")
+        prices = search_results.pages_price_array(results)
+        check = search_results.check_order(prices, descending=sort == "price-desc")
+        if check.checked < 2:
+            self.fail(f"Not enough priced results to verify the '{sort}' order")
+        if check.disorder > max_disorder:
+            self.fail(
+                f"Results are not sorted by {sort}: {search_results.describe(check)} "
+                f"(first wrong step after item {check.first_bad})"
+            )
+        return check
+
+    def walk_pagination(self, pages=None, timeout=20):
+        """Load results pages 1..pages from the current results page all at
+        once in background tabs and check the combined result sets (see
+        pagination.walk). Fails on pages that didn't load or came back empty."""
+        report = pagination.walk(self.driver, pages or settings.WALK_PAGES, timeout)
+        print("Pagination walk:")
+        for line in pagination.latency_lines(report):
+            print(line)
+        failed = [p["page"] for p in report["pages"] if p["error"]]
+        if failed or report["empty"]:
+            self.fail(f"Pages failed to load: {failed}, pages with no results: {report['empty']}")
+        return report
+
+    def run_filter_matrix(self, keyword, depth=None):
+        """From the keyword's results page (already open), load every
+        combination of up to `depth` sidebar facets in background tabs and
+        check each one's Clear link (see filter_matrix.run). Fails on
+        combinations that didn't load or whose Clear doesn't go back."""
+        report = filter_matrix.run(
+            self.driver, self.base_url, keyword, depth or settings.FILTER_DEPTH,
+            per_group=settings.FILTER_VALUES, limit=settings.FILTER_MAX_COMBOS,
+            batch=settings.FILTER_TABS,
+        )
+        for line in filter_matrix.report_lines(report):
+            print(line)
+        if not report["rows"]:
+            self.fail("No sidebar facets found to combine")
+        failed = [" + ".join(r["filters"]) for r in report["rows"] if r["error"]]
+        broken = [" + ".join(r["filters"]) for r in report["rows"] if r["clear_restores"] is False]
+        if failed or broken:
+            self.fail(f"Filter combinations that failed to load: {failed}; "
+                      f"Clear didn't restore the results for: {broken}")
+        return report
+
+    def menu_index(self):
+        """Index of the (open) hamburger menu, cached on disk; see hmenu_index."""
+        # The sub-menus are fetched the first time the menu opens
+        self.wait_for_element_present(
+            '#hmenu-content ul.hmenu[data-menu-id]:not([data-menu-id="1"])', timeout=15
+        )
+        return hmenu_index.build(self.driver, settings.HMENU_INDEX_FILE)
+
+    def open_hmenu_path(self, *labels):
+        """Go straight to a menu item by its label path, e.g.
+        open_hmenu_path("Electronics", "Wearable Technology"). Jumps directly
+        into the sub-menu holding it, then clicks it. Returns the index entry."""
+        index = self.menu_index()
+        entry = index.resolve(*labels)
+        if entry["menu"] != hmenu_index.ROOT_MENU and entry["menu"] in index.openers:
+            self.js_click(hmenu_index.selector(index.openers[entry["menu"]]))
+            self.wait_for_element_visible(
+                f'ul.hmenu-visible[data-menu-id="{entry["menu"]}"]', timeout=10
+            )
+        self.js_click(hmenu_index.selector(entry))
+        if entry["opens"]:
+            self.wait_for_element_visible(
+                f'ul.hmenu-visible[data-menu-id="{entry["opens"]}"]', timeout=10
+            )
+        return entry
+
+    def probe_dom(self, spec):
+        """Check a whole set of selectors in one round trip (see dom_probe)."""
+        return dom_probe.probe(self.driver, spec)
+
+    def _pump_cdp_events(self):
+        driver = getattr(self, "driver", None)
+        if driver is not None:
+            cdp_events.pump_for(driver).poll()
+
+    def _blocked_patterns(self):
+        if not settings.BLOCK_RESOURCES:
+            return []
+        test_method = getattr(self, self._testMethodName)
+        entries = getattr(test_method, "block_resources", self.block_resources)
+        return resource_blocking.patterns_for(entries)
+
+    def _start_fast_mode(self):
+        self._fast_mode_patterns = self._blocked_patterns()
+        # A reused browser may still carry the previous class's block list
+        resource_blocking.apply(self.driver, self._fast_mode_patterns)
+        if settings.RESOURCE_REPORT:
+            pump = cdp_events.pump_for(self.driver)
+            if not pump.has_subscriber("resource_meter"):
+                pump.subscribe("resource_meter", resource_blocking.ResourceMeter())
+            # Drop whatever the previous test (or the state wipe) left in the log
+            pump.poll()
+            self._resource_meter = pump.subscriber("resource_meter")
+            self._resource_meter.reset()
+
+    def _report_fast_mode(self):
+        meter = getattr(self, "_resource_meter", None)
+        if meter is None:
+            return
+        result = resource_blocking.savings.add(
+            self.id(), meter, bool(self._fast_mode_patterns)
+        )
+        if result:
+            print(f"Fast mode: {resource_blocking.describe(result)}")
+
+    def _start_har(self):
+        pump = cdp_events.pump_for(self.driver)
+        # Whatever is still in the log belongs to the previous test
+        pump.poll()
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+        except WebDriverException:
+            pass
+        self._har = har_capture.HarWriter(har_capture.har_path(settings.HAR_DIR, self.id()))
+        pump.subscribe("har", self._har)
+
+    def _finish_har(self):
+        har = getattr(self, "_har", None)
+        if har is None:
+            return
+        cdp_events.pump_for(self.driver).unsubscribe("har")
+        har.close()
+        self._har = None
+        print(f"HAR: {har.entries} requests in {har.path}")
+
+    def _start_memory_sampling(self):
+        test_method = getattr(self, self._testMethodName)
+        every = getattr(test_method, "memory_sample_every", self.memory_sample_every)
+        self._memory_listener = None
+        if not every or not settings.TRACE:
+            # Step sampling rides on the step tracer; without it only per-test samples
+            return
+        profile = memory_profile.profile_for(self.driver)
+
+        def sample(tracer, name):
+            if tracer.step_count % every == 0:
+                profile.sample(self.id(), f"step {tracer.step_count} ({name})")
+
+        self._memory_listener = sample
+        step_trace.step_listeners.append(sample)
+
+    def _finish_memory_sampling(self):
+        if self._memory_listener is not None:
+            step_trace.step_listeners.remove(self._memory_listener)
+            self._memory_listener = None
+        record = memory_profile.after_test(self.driver, self.id())
+        if record:
+            print(f"Memory: {memory_profile.describe(record)}")
+
+    def _report_interstitials(self):
+        if not getattr(self, "_guarded", False):
+            return
+        for entry in interstitial_guard.collect(self.driver, self.id()):
+            print(f"Dismissed {entry['blocker']} on {entry['url']}")
+
+    def _report_vitals(self):
+        if not getattr(self, "_vitals", False):
+            return
+        records = web_vitals.store.add(
+            self.id(), web_vitals.collect(self.driver), bool(self._fast_mode_patterns)
+        )
+        if settings.RUN_HISTORY:
+            run_history.history.add_pages(self.id(), records)
+        for record in records:
+            print(f"Vitals {web_vitals.describe(record)}")
+
+    def _start_recording(self):
+        global _archive
+        if _archive is None:
+            _archive = storefront_replay.Archive(settings.RECORD_ARCHIVE)
+        pump = cdp_events.pump_for(self.driver)
+        if not pump.has_subscriber("recorder"):
+            main_host = urlsplit(self.base_url).hostname
+            pump.subscribe(
+                "recorder", storefront_replay.Recorder(self.driver, _archive, main_host)
+            )
+
+
+# Learned timeouts go innermost so the trace still times the real wait
+if settings.ADAPTIVE_TIMEOUTS:
+    for _name in adaptive_timeouts.ADAPTIVE_STEPS:
+        setattr(AmazonBaseCase, _name,
+                adaptive_timeouts.adaptive(_name, getattr(AmazonBaseCase, _name)))
+
+# Wrap the common steps so each call shows up in the per-test timing trace
+if settings.TRACE:
+    for _name in step_trace.TRACED_STEPS:
+        setattr(AmazonBaseCase, _name,
+                step_trace.traced(_name, getattr(AmazonBaseCase, _name)))
+
+# Time every selector in the page as it gets used. Wrapped around the traced
+# step so the audit isn't counted in the step's time; its script calls still
+# show up in the trace as webdriver spans of their own.
+if settings.LOCATOR_AUDIT:
+    for _name in locator_audit.AUDITED_STEPS:
+        setattr(AmazonBaseCase, _name,
+                locator_audit.audited(_name, getattr(AmazonBaseCase, _name)))
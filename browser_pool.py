@@ -0,0 +1,83 @@
+"""
+Session-scoped browser reuse.
+
+SeleniumBase can keep a single driver alive across tests (its --rs mode). The
+pool turns that on for every AmazonBaseCase, isolates tests with a CDP storage
+wipe instead of a relaunch, and keeps count of how many launches were avoided.
+"""
+
+from seleniumbase import config as sb_config
+from selenium.common.exceptions import WebDriverException
+
+
+class BrowserPool:
+    def __init__(self):
+        self.launches = 0
+        self.reuses = 0
+        self._maximized = set()
+        self._previous = None
+
+    def before_setup(self):
+        """Called right before BaseCase.setUp() so it picks up the warm driver."""
+        sb_config.reuse_session = True
+        self._previous = getattr(sb_config, "shared_driver", None)
+
+    def after_setup(self, driver):
+        if driver is not None and driver is self._previous:
+            self.reuses += 1
+        else:
+            self.launches += 1
+            self._maximized.clear()
+
+    def needs_maximize(self, driver):
+        """Only the first test on a fresh browser has to maximize it."""
+        if id(driver) in self._maximized:
+            return False
+        self._maximized.add(id(driver))
+        return True
+
+    def release(self, driver):
+        """Wipe cookies and storage so the next test starts clean. If the wipe
+        fails the browser is thrown away and the next test gets a fresh one."""
+        try:
+            wipe_browser_state(driver)
+        except WebDriverException as e:
+            print(f"Browser pool: state wipe failed ({e.__class__.__name__}), relaunching")
+            self.discard(driver)
+
+    def discard(self, driver):
+        if getattr(sb_config, "shared_driver", None) is driver:
+            sb_config.shared_driver = None
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def summary(self):
+        total = self.launches + self.reuses
+        return (
+            f"Browser pool: {total} tests, {self.launches} browser launch(es), "
+            f"{self.reuses} launch(es) avoided"
+        )
+
+
+def wipe_browser_state(driver):
+    """Clear cookies, local/session storage, IndexedDB and service workers."""
+    # sessionStorage belongs to the tab, so it has to be cleared from the page itself
+    origin = driver.execute_script(
+        "try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}"
+        "return location.origin;"
+    )
+    driver.get("about:blank")
+    if not hasattr(driver, "execute_cdp_cmd"):
+        driver.delete_all_cookies()
+        return
+    if origin and origin.startswith("http"):
+        driver.execute_cdp_cmd(
+            "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+        )
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+
+# One pool per process; each parallel worker gets its own.
+pool = BrowserPool()
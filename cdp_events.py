@@ -0,0 +1,63 @@
+"""
+Shared reader for Chrome's performance log (CDP events).
+
+driver.get_log("performance") drains the log, so only one place may read it.
+Every feature that needs CDP events (recording, HAR, ...) subscribes to the
+pump for its driver instead, and the pump fans each event out to them.
+The browser has to be started with CDP logging on (SeleniumBase's --log-cdp,
+which AmazonBaseCase switches on automatically when something needs it).
+"""
+
+import json
+import weakref
+
+from selenium.common.exceptions import WebDriverException
+
+_pumps = weakref.WeakKeyDictionary()
+
+
+class CdpEventPump:
+    def __init__(self, driver):
+        self.driver = driver
+        self.available = True
+        self._subscribers = {}
+
+    def subscribe(self, key, callback):
+        """callback(method, params) gets every CDP event; one callback per key."""
+        self._subscribers[key] = callback
+
+    def unsubscribe(self, key):
+        self._subscribers.pop(key, None)
+
+    def has_subscriber(self, key):
+        return key in self._subscribers
+
+    def subscriber(self, key):
+        return self._subscribers.get(key)
+
+    def poll(self):
+        """Drain the performance log and dispatch everything in it."""
+        if not self.available or not self._subscribers:
+            return
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException:
+            # Browser was started without CDP logging; nothing to pump
+            self.available = False
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            for callback in list(self._subscribers.values()):
+                callback(method, params)
+
+
+def pump_for(driver):
+    pump = _pumps.get(driver)
+    if pump is None:
+        pump = _pumps[driver] = CdpEventPump(driver)
+    return pump
@@ -0,0 +1,82 @@
+"""Session-level pytest hooks shared by all test modules."""
+
+from collections import defaultdict
+
+import adaptive_timeouts
+import durations
+import interstitial_guard
+import locator_audit
+import memory_profile
+import resource_blocking
+import run_history
+import screenshots
+import settings
+import step_trace
+import web_vitals
+from browser_pool import pool
+
+# setup + call + teardown time per test id, for run_parallel.py's shard planner
+_test_durations = defaultdict(float)
+
+
+def pytest_runtest_logreport(report):
+    _test_durations[report.nodeid] += report.duration
+    if settings.RUN_HISTORY:
+        run_history.history.add_report(report)
+
+
+# LCP regressions found at the end of the run, for the terminal summary
+_vitals_failures = []
+# (path, error) of screenshots that never made it to disk
+_screenshot_failures = []
+
+
+def pytest_sessionfinish(session):
+    # Make sure every background screenshot is on disk before pytest exits
+    _screenshot_failures.extend(screenshots.flush())
+    if _screenshot_failures and session.exitstatus == 0:
+        session.exitstatus = 1
+    resource_blocking.savings.save()
+    if settings.LOCATOR_AUDIT:
+        locator_audit.audit.save(locator_audit.audit_file())
+    # A parallel worker only saw part of the pages; run_parallel.py gates the
+    # whole run from the merged vitals file
+    if not settings.WORKER_ID:
+        if settings.VITALS_UPDATE_BASELINE:
+            web_vitals.store.save_baseline()
+        else:
+            _vitals_failures.extend(web_vitals.store.gate())
+            if _vitals_failures and session.exitstatus == 0:
+                session.exitstatus = 1
+    if settings.RUN_HISTORY:
+        run_history.history.save(settings.RUN_HISTORY_DB)
+    if not _test_durations:
+        return
+    path = settings.DURATIONS_FILE
+    if settings.WORKER_ID:
+        path = durations.worker_file(path, settings.WORKER_ID)
+    durations.save(path, _test_durations)
+
+
+def pytest_terminal_summary(terminalreporter):
+    for line in resource_blocking.savings.summary_lines():
+        terminalreporter.write_line(line)
+    for line in interstitial_guard.summary_lines():
+        terminalreporter.write_line(line)
+    for line in web_vitals.store.summary_lines():
+        terminalreporter.write_line(line)
+    for failure in _vitals_failures:
+        terminalreporter.write_line(f"LCP REGRESSION {failure}", red=True)
+    for path, error in _screenshot_failures:
+        terminalreporter.write_line(f"SCREENSHOT NOT SAVED {path}: {error}", red=True)
+    for line in memory_profile.summary_lines():
+        terminalreporter.write_line(line, yellow=True)
+    if settings.LOCATOR_AUDIT:
+        for line in locator_audit.audit.summary_lines():
+            terminalreporter.write_line(line)
+    for line in adaptive_timeouts.summary_lines():
+        terminalreporter.write_line(line, yellow=True)
+    for line in step_trace.summary_lines():
+        terminalreporter.write_line(line)
+    if settings.REUSE_BROWSER and (pool.launches or pool.reuses):
+        terminalreporter.write_line(pool.summary())
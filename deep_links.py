@@ -0,0 +1,34 @@
+"""
+URL builders for setting up preconditions directly.
+
+When the thing under test is pagination or the filter sidebar, typing the
+query into the homepage search box is pure overhead. These helpers build the
+results-page URL for a keyword, page number, sort order and/or refinement set
+so a test can open it in a single navigation.
+"""
+
+from urllib.parse import urlencode, urljoin
+
+RESULT_SELECTOR = 'div[data-component-type="s-search-result"]'
+
+# Friendly names for Amazon's "s=" sort values
+SORT_ORDERS = {
+    "featured": "relevanceblender",
+    "price-asc": "price-asc-rank",
+    "price-desc": "price-desc-rank",
+    "reviews": "review-rank",
+    "newest": "date-desc-rank",
+}
+
+
+def search_url(base_url, keyword, page=None, refinements=None, sort=None):
+    """Results page for keyword; refinements are raw rh terms such as
+    "p_n_feature_browse-bin:123" and sort is a SORT_ORDERS key or raw s= value."""
+    params = [("k", keyword)]
+    if refinements:
+        params.append(("rh", ",".join(refinements)))
+    if sort:
+        params.append(("s", SORT_ORDERS.get(sort, sort)))
+    if page and page > 1:
+        params.append(("page", str(page)))
+    return urljoin(base_url, "s") + "?" + urlencode(params)
@@ -0,0 +1,99 @@
+"""
+Batched DOM probes.
+
+Instead of a chain of is_element_present / is_element_visible / get_attribute /
+find_elements calls (one WebDriver round trip each), describe everything you
+want to know up front and resolve it in a single execute_script call:
+
+    snapshot = self.probe_dom({
+        "title": ("#productTitle", "text"),
+        "thumbs": ("#altImages li.imageThumbnail", "count"),
+        "first_thumb": ('(//div[@id="altImages"]//li)[1]', "visible"),
+    })
+
+Selectors can be CSS, XPath (starting with "/" or "(") or CSS with a jQuery
+style :contains("text"). Checks: present, visible, enabled, count,
+visible_count, text, attr:<name>. A bare selector string means "present".
+"""
+
+from selenium.common.exceptions import InvalidSelectorException
+
+CHECKS = ("present", "visible", "enabled", "count", "visible_count", "text")
+
+PROBE_JS = """
+var spec = arguments[0], out = {};
+function resolve(sel) {
+    if (/^\\(*\\.?\\//.test(sel)) {
+        var found = document.evaluate(sel, document, null,
+            XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), list = [];
+        for (var i = 0; i < found.snapshotLength; i++) { list.push(found.snapshotItem(i)); }
+        return list;
+    }
+    var m = sel.match(/^(.*?):contains\\((["']?)(.*?)\\2\\)(.*)$/);
+    if (m) {
+        var base = Array.prototype.filter.call(
+            document.querySelectorAll(m[1] || "*"),
+            function (el) { return el.textContent.indexOf(m[3]) !== -1; });
+        if (!m[4].trim()) { return base; }
+        var rest = [];
+        base.forEach(function (el) {
+            rest.push.apply(rest, el.querySelectorAll(":scope" + m[4]));
+        });
+        return rest;
+    }
+    return Array.prototype.slice.call(document.querySelectorAll(sel));
+}
+function visible(el) {
+    var r = el.getBoundingClientRect(), s = getComputedStyle(el);
+    return r.width > 0 && r.height > 0 && s.visibility !== "hidden"
+        && s.display !== "none" && parseFloat(s.opacity) > 0;
+}
+Object.keys(spec).forEach(function (name) {
+    var sel = spec[name][0], check = spec[name][1], els;
+    try { els = resolve(sel); } catch (e) { out[name] = {error: String(e)}; return; }
+    var first = els[0];
+    if (check === "present") { out[name] = els.length > 0; }
+    else if (check === "visible") { out[name] = !!first && visible(first); }
+    else if (check === "enabled") { out[name] = !!first && !first.disabled; }
+    else if (check === "count") { out[name] = els.length; }
+    else if (check === "visible_count") { out[name] = els.filter(visible).length; }
+    else if (check === "text") { out[name] = first ? first.innerText.trim() : null; }
+    else if (check.indexOf("attr:") === 0) {
+        var attr = check.slice(5);
+        if (!first) { out[name] = null; }
+        else {
+            // Same rule as WebDriver's get_attribute: prefer the live property
+            var prop = first[attr];
+            out[name] = (prop !== undefined && prop !== null && typeof prop !== "object")
+                ? String(prop) : first.getAttribute(attr);
+        }
+    }
+});
+return out;
+"""
+
+
+def normalize_spec(spec):
+    """Turn {name: selector | (selector, check)} into {name: [selector, check]}."""
+    normalized = {}
+    for name, item in spec.items():
+        selector, check = (item, "present") if isinstance(item, str) else item
+        if check not in CHECKS and not check.startswith("attr:"):
+            raise ValueError(f"Unknown probe check {check!r} for {name!r}")
+        normalized[name] = [selector, check]
+    return normalized
+
+
+def probe(driver, spec):
+    """Resolve every selector/check in one round trip; returns {name: value}.
+
+    Raises InvalidSelectorException if the page can't parse a selector, so a
+    typo never passes as a truthy value."""
+    spec = normalize_spec(spec)
+    result = driver.execute_script(PROBE_JS, spec)
+    for name, value in result.items():
+        if isinstance(value, dict) and "error" in value:
+            raise InvalidSelectorException(
+                f"Probe {name!r}: invalid selector {spec[name][0]!r} ({value['error']})"
+            )
+    return result
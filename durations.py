@@ -0,0 +1,48 @@
+"""
+Recorded per-test durations.
+
+conftest.py adds up setup + call + teardown time for each test and stores it
+here at the end of the run. run_parallel.py reads the file back to balance its
+shards. Worker processes write to their own side file, which the runner merges
+once every worker is done, so parallel runs never fight over one file.
+"""
+
+import glob
+import json
+import os
+
+
+def worker_file(path, worker_id):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker_id}{ext}"
+
+
+def load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save(path, durations):
+    """Merge the given durations into the file (newest value wins)."""
+    merged = load(path)
+    merged.update({k: round(v, 3) for k, v in durations.items()})
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(merged, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def merge_worker_files(path):
+    """Fold every worker side file back into the main file and remove them."""
+    root, ext = os.path.splitext(path)
+    merged = {}
+    worker_files = glob.glob(f"{glob.escape(root)}.*{ext}")
+    for worker_path in worker_files:
+        merged.update(load(worker_path))
+    if merged:
+        save(path, merged)
+    for worker_path in worker_files:
+        os.remove(worker_path)
@@ -0,0 +1,190 @@
+"""
+Filter matrix for the search sidebar.
+
+Reads every refinement link in #s-refinements once, works out the rh term
+each one adds, and builds the results URL for every combination of facets
+up to depth k (at most one value per facet group, so every extra filter
+narrows the results). The URLs are loaded in batches of background tabs
+(tabs.py). For each combination the run records:
+
+  * the result count (from the "1-48 of over N results" bar) and cards shown
+  * load latency (Navigation Timing)
+  * whether the facet's "Clear" link really goes back to the result set
+    without that facet (for single filters: the unfiltered results)
+
+The Clear links are checked in a second wave of tabs.
+"""
+
+import itertools
+import re
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import deep_links
+import tabs
+
+FACETS_JS = """
+var links = [];
+document.querySelectorAll("#s-refinements a[href*='rh=']").forEach(function (a) {
+    links.push({
+        href: a.href,
+        label: (a.getAttribute("aria-label") || a.textContent || "").replace(/\\s+/g, " ").trim()
+    });
+});
+return links;
+"""
+
+PAGE_JS = """
+var info = document.querySelector(
+    "[data-component-type='s-result-info-bar'] h1 span, [data-component-type='s-result-info-bar'] .a-section span");
+var cards = document.querySelectorAll(arguments[0]);
+var clear = [];
+document.querySelectorAll("#s-refinements a").forEach(function (a) {
+    if (/^clear$/i.test((a.textContent || "").trim()) && a.href) { clear.push(a.href); }
+});
+return {
+    info: info ? info.textContent.trim() : null,
+    cards: cards.length,
+    asins: Array.prototype.map.call(cards, function (c) { return c.getAttribute("data-asin"); })
+        .filter(function (a) { return a; }),
+    clear: clear
+};
+"""
+
+
+def rh_terms(url):
+    """Refinement terms (rh=...) of a results URL, as a frozenset."""
+    rh = parse_qs(urlsplit(url).query).get("rh", [""])[0]
+    return frozenset(term for term in rh.split(",") if term)
+
+
+def result_count(info):
+    """'1-48 of over 50,000 results for "clothes"' -> 50000 (None if unknown)."""
+    if not info:
+        return None
+    m = re.search(r"of (?:over )?([\d,]+)", info) or re.search(r"([\d,]+) results?", info)
+    return int(m.group(1).replace(",", "")) if m else None
+
+
+def facet_group(terms):
+    """Facet key of the terms a link adds (p_n_size_browse-vebin, p_89, ...)."""
+    keys = sorted(t.split(":")[0] for t in terms if not t.startswith("n:"))
+    return keys[0] if keys else sorted(terms)[0].split(":")[0]
+
+
+def read_facets(driver, per_group):
+    """{group key: [(label, terms), ...]} for the current results page."""
+    current = rh_terms(driver.current_url)
+    groups = {}
+    for link in driver.execute_script(FACETS_JS):
+        added = rh_terms(link["href"]) - current
+        if not added or not link["label"]:
+            continue
+        values = groups.setdefault(facet_group(added), [])
+        if len(values) < per_group and added not in [terms for _, terms in values]:
+            values.append((link["label"], added))
+    return groups
+
+
+def combinations(groups, depth, limit):
+    """Every pick of one value from each of up to `depth` groups, shallow first."""
+    combos = []
+    for size in range(1, depth + 1):
+        for picked in itertools.combinations(sorted(groups), size):
+            for values in itertools.product(*(groups[g] for g in picked)):
+                combos.append(tuple(zip(picked, values)))
+                if len(combos) >= limit:
+                    return combos
+    return combos
+
+
+def overlap(a, b):
+    """Jaccard similarity of two ASIN lists (Amazon reshuffles a little per load)."""
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def run(driver, base_url, keyword, depth, per_group=3, limit=60, batch=6, timeout=30):
+    """Run the matrix from the keyword's unfiltered results page (already open)."""
+    base = driver.execute_script(PAGE_JS, deep_links.RESULT_SELECTOR)
+    groups = read_facets(driver, per_group)
+    combos = combinations(groups, depth, limit)
+    common = rh_terms(driver.current_url)
+
+    def terms_of(combo):
+        return frozenset(common.union(*(terms for _, (_, terms) in combo)))
+
+    def load(urls):
+        pages = []
+        for start in range(0, len(urls), batch):
+            pages.extend(tabs.load_in_tabs(
+                driver, urls[start:start + batch], "div.s-main-slot",
+                lambda d: d.execute_script(PAGE_JS, deep_links.RESULT_SELECTOR), timeout,
+            ))
+        return pages
+
+    started = time.monotonic()
+    urls = [deep_links.search_url(base_url, keyword, refinements=sorted(terms_of(c)))
+            for c in combos]
+    pages = load(urls)
+
+    rows = []
+    by_terms = {frozenset(common): base}
+    for combo, url, page in zip(combos, urls, pages):
+        data = page["data"] or {}
+        rows.append({
+            "filters": [label for _, (label, _) in combo],
+            "url": url,
+            "count": result_count(data.get("info")),
+            "cards": data.get("cards", 0),
+            "ttfb_ms": (page["timing"] or {}).get("ttfb_ms"),
+            "dom_content_loaded_ms": (page["timing"] or {}).get("dom_content_loaded_ms"),
+            "error": page["error"],
+            "clear_restores": None,
+            "_data": data,
+            "_parent": terms_of(combo[:-1]),
+        })
+        if page["data"]:
+            by_terms[terms_of(combo)] = data
+
+    # Second wave: each combination's Clear link for its last facet should lead
+    # back to the combination without it, whose results we already have
+    checks = []
+    for row in rows:
+        parent = by_terms.get(row["_parent"])
+        for href in row["_data"].get("clear", []):
+            if parent is not None and rh_terms(href) == row["_parent"]:
+                checks.append((row, href, parent))
+                break
+    cleared = load([href for _, href, _ in checks])
+    for (row, _, parent), page in zip(checks, cleared):
+        if page["data"]:
+            row["clear_restores"] = overlap(page["data"]["asins"], parent["asins"]) >= 0.8
+
+    for row in rows:
+        for key in ("_data", "_parent"):
+            row.pop(key)
+    return {
+        "groups": {key: [label for label, _ in values] for key, values in groups.items()},
+        "base_count": result_count(base.get("info")),
+        "rows": rows,
+        "wall_s": time.monotonic() - started,
+    }
+
+
+def report_lines(report):
+    lines = [
+        f"Filter matrix: {len(report['rows'])} combinations over "
+        f"{len(report['groups'])} facet groups in {report['wall_s']:.1f}s "
+        f"(unfiltered: {report['base_count']} results)"
+    ]
+    for row in report["rows"]:
+        clear = {True: "clear ok", False: "CLEAR BROKEN", None: "clear n/a"}[row["clear_restores"]]
+        if row["error"]:
+            lines.append(f"  {' + '.join(row['filters'])}: failed ({row['error']})")
+            continue
+        lines.append(
+            f"  {' + '.join(row['filters'])}: {row['count']} results, {row['cards']} shown, "
+            f"TTFB {row['ttfb_ms'] or 0:.0f}ms, {clear}"
+        )
+    return lines
@@ -0,0 +1,219 @@
+"""
+Per-test HAR files plus a report of the slowest/heaviest resources.
+
+HarWriter subscribes to the CDP event pump and writes each request to the
+test's .har file as soon as it finishes. Only the requests still in flight
+are kept in memory. Entries are compact: no headers, cookies or bodies, just
+what's needed to see where the time went (timings phase by phase, size,
+type, initiator, priority).
+
+After a run:
+    python har_capture.py report                # har_output/ by default
+    python har_capture.py report --dir har_output --top 30
+
+ranks resources across all tests by total time, by single-request time and by
+bytes, and shows how much of it came from each host.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import settings
+
+CREATOR = {"name": "amazon-ui-tests har_capture", "version": "1"}
+
+
+def har_path(har_dir, test_id):
+    name = re.sub(r"[^\w.-]+", "_", test_id).strip("_")
+    return os.path.join(har_dir, f"{name}.har")
+
+
+def _iso(wall_time):
+    return datetime.fromtimestamp(wall_time, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _phase(timing, start, end):
+    if not timing or timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return -1
+    return max(0.0, timing[end] - timing[start])
+
+
+class HarWriter:
+    """CDP event subscriber streaming finished requests into one HAR file."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w")
+        self._file.write(json.dumps({
+            "log": {"version": "1.2", "creator": CREATOR, "pages": [], "entries": []}
+        })[:-3])  # leave "entries": [ open
+        self._pending = {}
+        self.entries = 0
+
+    def __call__(self, method, params):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            redirect = params.get("redirectResponse")
+            if redirect and request_id in self._pending:
+                pending = self._pending.pop(request_id)
+                pending["response"] = redirect
+                self._write(pending, params["timestamp"], redirect.get("encodedDataLength", 0))
+            self._pending[request_id] = {
+                "request": params["request"],
+                "type": params.get("type", "Other"),
+                "initiator": params.get("initiator", {}).get("type"),
+                "wall_time": params.get("wallTime"),
+                "timestamp": params["timestamp"],
+                "response": None,
+            }
+        elif method == "Network.responseReceived" and request_id in self._pending:
+            self._pending[request_id]["response"] = params["response"]
+        elif method == "Network.loadingFinished" and request_id in self._pending:
+            self._write(self._pending.pop(request_id), params["timestamp"],
+                        params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and request_id in self._pending:
+            pending = self._pending.pop(request_id)
+            pending["error"] = params.get("blockedReason") or params.get("errorText")
+            self._write(pending, params["timestamp"], 0)
+
+    def _write(self, pending, end_timestamp, size):
+        request = pending["request"]
+        if not request.get("url", "").startswith("http"):
+            return
+        response = pending["response"] or {}
+        timing = response.get("timing")
+        total = (end_timestamp - pending["timestamp"]) * 1000
+        wait = _phase(timing, "sendEnd", "receiveHeadersEnd")
+        receive = -1
+        if timing:
+            headers_at = (timing["requestTime"] - pending["timestamp"]) * 1000 \
+                + timing["receiveHeadersEnd"]
+            receive = max(0.0, total - headers_at)
+        entry = {
+            "startedDateTime": _iso(pending["wall_time"] or 0),
+            "time": round(total, 1),
+            "request": {
+                "method": request.get("method", "GET"), "url": request["url"],
+                "httpVersion": response.get("protocol", ""), "cookies": [],
+                "headers": [], "queryString": [], "headersSize": -1, "bodySize": -1,
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""), "cookies": [], "headers": [],
+                "content": {"size": size, "mimeType": response.get("mimeType", "")},
+                "redirectURL": "", "headersSize": -1, "bodySize": size,
+            },
+            "cache": {},
+            "timings": {
+                "blocked": -1,
+                "dns": _phase(timing, "dnsStart", "dnsEnd"),
+                "connect": _phase(timing, "connectStart", "connectEnd"),
+                "ssl": _phase(timing, "sslStart", "sslEnd"),
+                "send": _phase(timing, "sendStart", "sendEnd"),
+                "wait": wait,
+                "receive": receive,
+            },
+            "_resourceType": pending["type"],
+            "_initiator": pending["initiator"],
+            "_priority": request.get("initialPriority"),
+            "_fromCache": bool(response.get("fromDiskCache") or response.get("fromServiceWorker")),
+        }
+        if pending.get("error"):
+            entry["_error"] = pending["error"]
+        self._file.write(("," if self.entries else "") + "\n" + json.dumps(entry))
+        self.entries += 1
+
+    def close(self):
+        """Write out what's still in flight (as unfinished) and close the file."""
+        for pending in self._pending.values():
+            pending["error"] = "unfinished"
+            self._write(pending, pending["timestamp"], 0)
+        self._pending = {}
+        self._file.write("\n]}}\n")
+        self._file.close()
+
+
+def _resource_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def aggregate(har_dir):
+    """Per resource (URL without query): count, total/max time, bytes, tests."""
+    resources = defaultdict(lambda: {
+        "count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0, "tests": set(), "type": None,
+    })
+    for name in sorted(os.listdir(har_dir)):
+        if not name.endswith(".har"):
+            continue
+        try:
+            with open(os.path.join(har_dir, name)) as f:
+                entries = json.load(f)["log"]["entries"]
+        except (OSError, ValueError, KeyError):
+            print(f"Skipping unreadable {name}")
+            continue
+        for entry in entries:
+            r = resources[_resource_key(entry["request"]["url"])]
+            r["count"] += 1
+            r["total_ms"] += max(entry["time"], 0)
+            r["max_ms"] = max(r["max_ms"], entry["time"])
+            r["bytes"] += max(entry["response"]["bodySize"], 0)
+            r["tests"].add(name[:-4])
+            r["type"] = entry.get("_resourceType")
+    return resources
+
+
+def report(har_dir, top):
+    resources = aggregate(har_dir)
+    if not resources:
+        print(f"No HAR files in {har_dir}")
+        return
+    total_ms = sum(r["total_ms"] for r in resources.values())
+    total_bytes = sum(r["bytes"] for r in resources.values())
+    tests = set().union(*(r["tests"] for r in resources.values()))
+    print(f"{len(resources)} resources over {len(tests)} tests, "
+          f"{total_ms / 1000:.1f}s request time, {total_bytes / 1e6:.1f} MB")
+
+    def table(title, key, fmt):
+        print(f"\n{title}")
+        ranked = sorted(resources.items(), key=lambda kv: kv[1][key], reverse=True)
+        for url, r in ranked[:top]:
+            print(f"  {fmt(r):>12}  x{r['count']:<4} {r['type'] or '':<10} {url[:110]}")
+
+    table("Most total time:", "total_ms", lambda r: f"{r['total_ms'] / 1000:.2f}s")
+    table("Slowest single request:", "max_ms", lambda r: f"{r['max_ms']:.0f}ms")
+    table("Heaviest:", "bytes", lambda r: f"{r['bytes'] / 1e6:.2f}MB")
+
+    hosts = defaultdict(lambda: [0.0, 0])
+    for url, r in resources.items():
+        host = urlsplit(url).netloc
+        hosts[host][0] += r["total_ms"]
+        hosts[host][1] += r["bytes"]
+    print("\nBy host:")
+    for host, (ms, size) in sorted(hosts.items(), key=lambda kv: kv[1][0], reverse=True)[:top]:
+        # Cached/blocked-only captures can have no request time at all
+        share = ms / total_ms if total_ms else 0
+        print(f"  {share:6.1%} of time  {size / 1e6:8.2f}MB  {host}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slow/heavy resource report from per-test HARs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_cmd = sub.add_parser("report")
+    report_cmd.add_argument("--dir", default=settings.HAR_DIR)
+    report_cmd.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+    report(args.dir, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
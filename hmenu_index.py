@@ -0,0 +1,182 @@
+"""
+Cached index of the hamburger menu (#hmenu-content).
+
+One script call serializes every menu item (the menu it sits in, label, href,
+and the sub-menu it opens) and the result is kept on disk. The page computes
+a hash over the menu content first, so the full extraction and rebuild only
+happen when Amazon actually changed the menu. Tests then resolve a category
+path like ("Electronics", "Wearable Technology") with a dict lookup and jump
+straight into the right sub-menu instead of clicking and waiting level by level.
+
+crawl() uses the index to check every leaf link, a batch of tabs at a time.
+"""
+
+import json
+import os
+import re
+import tempfile
+from urllib.parse import urljoin
+
+import tabs
+
+ROOT_MENU = "1"
+
+# arguments[0]: only return the content hash (cheap check against the cache)
+EXTRACT_JS = """
+var hashOnly = arguments[0];
+var root = document.querySelector("#hmenu-content");
+if (!root) { return null; }
+var hash = 0x811c9dc5, entries = [];
+var mix = function (s) {
+    for (var i = 0; i < s.length; i++) {
+        hash ^= s.charCodeAt(i);
+        hash = Math.imul(hash, 16777619) >>> 0;
+    }
+};
+root.querySelectorAll("ul.hmenu[data-menu-id] a.hmenu-item").forEach(function (a) {
+    if (a.classList.contains("hmenu-back-button")) { return; }
+    var menu = a.closest("ul.hmenu[data-menu-id]").getAttribute("data-menu-id");
+    var label = (a.textContent || "").replace(/\\s+/g, " ").trim();
+    var href = a.getAttribute("href");
+    var opens = a.getAttribute("data-menu-id");
+    mix(menu + "|" + label + "|" + (href || "") + "|" + (opens || "") + "\\n");
+    if (!hashOnly) {
+        entries.push({
+            menu: menu, label: label, href: href, opens: opens,
+            compressed: !!a.closest(".hmenu-compressed-content")
+        });
+    }
+});
+return {hash: hash.toString(16), entries: hashOnly ? null : entries};
+"""
+
+PAGE_CHECK_JS = """
+return {
+    title: document.title,
+    not_found: /page not found/i.test(document.title)
+        || !!document.querySelector('img[alt*="Dogs of Amazon"]')
+};
+"""
+
+_loaded = {}
+
+
+def normalize(label):
+    label = re.sub(r"\s+", " ", label.replace("&", " and ")).strip()
+    return label.casefold()
+
+
+class HmenuIndex:
+    def __init__(self, data):
+        self.hash = data["hash"]
+        self.entries = data["entries"]
+        # sub-menu id -> the item that opens it
+        self.openers = {}
+        for entry in self.entries:
+            if entry["opens"] and entry["opens"] not in self.openers:
+                self.openers[entry["opens"]] = entry
+        self.paths = {}
+        for entry in self.entries:
+            if not entry["label"]:
+                continue
+            path = self.menu_path(entry["menu"]) + (normalize(entry["label"]),)
+            self.paths.setdefault(path, entry)
+
+    def menu_path(self, menu_id, _seen=()):
+        """Labels leading from the main menu to menu_id, normalized."""
+        if menu_id == ROOT_MENU or menu_id not in self.openers or menu_id in _seen:
+            return ()
+        opener = self.openers[menu_id]
+        return (self.menu_path(opener["menu"], _seen + (menu_id,))
+                + (normalize(opener["label"]),))
+
+    def resolve(self, *labels):
+        key = tuple(normalize(label) for label in labels)
+        try:
+            return self.paths[key]
+        except KeyError:
+            raise KeyError(f"No menu item at {' > '.join(labels)}") from None
+
+    def leaves(self):
+        """Items that are plain links rather than sub-menu openers."""
+        return [
+            e for e in self.entries
+            if e["href"] and not e["opens"]
+            and not e["href"].startswith(("#", "javascript:"))
+        ]
+
+    def to_dict(self):
+        return {"hash": self.hash, "entries": self.entries}
+
+
+def selector(entry):
+    """CSS selector for exactly this menu item."""
+    scope = f'ul.hmenu[data-menu-id="{entry["menu"]}"] a.hmenu-item'
+    if entry["opens"]:
+        return f'{scope}[data-menu-id="{entry["opens"]}"]'
+    href = entry["href"].replace("\\", "\\\\").replace('"', '\\"')
+    return f'{scope}[href="{href}"]'
+
+
+def load(path):
+    if path in _loaded:
+        return _loaded[path]
+    try:
+        with open(path) as f:
+            index = HmenuIndex(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+    _loaded[path] = index
+    return index
+
+
+def save(path, index):
+    # A temp file of our own: parallel workers may rebuild the index at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    _loaded[path] = index
+
+
+def build(driver, path):
+    """Index of the menu on the current page (the menu has to be open so its
+    content is loaded). Re-extracted only when the content hash changed."""
+    current = driver.execute_script(EXTRACT_JS, True)
+    if current is None:
+        raise ValueError("#hmenu-content is not on the page")
+    cached = load(path)
+    if cached is not None and cached.hash == current["hash"]:
+        return cached
+    index = HmenuIndex(driver.execute_script(EXTRACT_JS, False))
+    save(path, index)
+    return index
+
+
+def crawl(driver, index, base_url, batch=8, timeout=30):
+    """Open every leaf link (batch tabs at a time). Returns the broken ones,
+    [{"label", "url", "status", "error"}, ...], and how many links were checked."""
+    urls = {}
+    for entry in index.leaves():
+        urls.setdefault(urljoin(base_url, entry["href"]), entry["label"])
+    urls = list(urls.items())
+    broken = []
+    for start in range(0, len(urls), batch):
+        chunk = urls[start:start + batch]
+        pages = tabs.load_in_tabs(
+            driver, [url for url, _ in chunk], "body",
+            lambda d: d.execute_script(PAGE_CHECK_JS), timeout,
+        )
+        for (url, label), page in zip(chunk, pages):
+            status = (page["timing"] or {}).get("status")
+            not_found = page["data"] and page["data"]["not_found"]
+            if page["error"] or not_found or (status and status >= 400):
+                broken.append({
+                    "label": label, "url": url, "status": status,
+                    "error": page["error"] or ("page not found" if not_found else None),
+                })
+    return broken, len(urls)
@@ -0,0 +1,115 @@
+"""
+Background guard against interstitials and overlays.
+
+GUARD_JS is registered with CDP Page.addScriptToEvaluateOnNewDocument, so it
+runs in every document the tab loads before any of the page's own scripts.
+It watches the DOM with a MutationObserver and clicks known blockers (the
+"Continue shopping" interstitial, the delivery-location toaster, the cookie
+banner) the moment they render. Each dismissal is logged to sessionStorage,
+and AmazonBaseCase collects the log at the end of the test.
+
+Tests no longer poll for these in setUp, and an overlay that shows up
+mid-test gets dismissed on its own instead of stalling the next click.
+"""
+
+import json
+
+from selenium.common.exceptions import WebDriverException
+
+LOG_KEY = "__amz_interstitials"
+
+# name -> CSS selector of the element that dismisses it
+BLOCKERS = {
+    "continue-shopping": 'button[alt="Continue shopping"]',
+    "location-toaster": ".glow-toaster-button-dismiss input, .glow-toaster-button-dismiss button",
+    "cookie-banner": "#sp-cc-accept",
+}
+
+GUARD_JS = """
+(function () {
+    var blockers = %s, logKey = "%s";
+    function visible(el) {
+        return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    }
+    function log(name) {
+        try {
+            var entries = JSON.parse(sessionStorage.getItem(logKey) || "[]");
+            entries.push({blocker: name, url: location.href, at_ms: performance.now()});
+            sessionStorage.setItem(logKey, JSON.stringify(entries));
+        } catch (e) {}
+    }
+    function sweep() {
+        for (var name in blockers) {
+            var el = document.querySelector(blockers[name]);
+            if (el && !el.__amzDismissed && visible(el)) {
+                el.__amzDismissed = true;
+                log(name);
+                el.click();
+            }
+        }
+    }
+    var queued = false;
+    function schedule() {
+        if (queued) { return; }
+        queued = true;
+        // One sweep per batch of mutations, right after the DOM changes
+        Promise.resolve().then(function () { queued = false; sweep(); });
+    }
+    function start() {
+        sweep();
+        new MutationObserver(schedule).observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true,
+            attributeFilter: ["class", "style", "hidden"]
+        });
+    }
+    if (document.documentElement) { start(); }
+    else { document.addEventListener("readystatechange", start, {once: true}); }
+})();
+""" % (json.dumps(BLOCKERS), LOG_KEY)
+
+COLLECT_JS = """
+var entries = sessionStorage.getItem(arguments[0]);
+sessionStorage.removeItem(arguments[0]);
+return entries ? JSON.parse(entries) : [];
+"""
+
+# Every dismissal in this process, for the end-of-run summary
+dismissed = []
+
+
+def install(driver):
+    """Register the guard for every new document in this tab. Returns False
+    when the browser has no CDP (the caller should fall back to polling)."""
+    if getattr(driver, "_interstitial_guard", None):
+        return True
+    try:
+        driver.execute_cdp_cmd("Page.enable", {})
+        result = driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": GUARD_JS}
+        )
+    except (AttributeError, WebDriverException):
+        return False
+    driver._interstitial_guard = result.get("identifier", True)
+    return True
+
+
+def collect(driver, test_id):
+    """Read (and clear) the current page's dismissal log."""
+    try:
+        entries = driver.execute_script(COLLECT_JS, LOG_KEY) or []
+    except WebDriverException:
+        return []
+    for entry in entries:
+        entry["test"] = test_id
+    dismissed.extend(entries)
+    return entries
+
+
+def summary_lines():
+    if not dismissed:
+        return []
+    counts = {}
+    for entry in dismissed:
+        counts[entry["blocker"]] = counts.get(entry["blocker"], 0) + 1
+    split = ", ".join(f"{name} x{n}" for name, n in sorted(counts.items()))
+    return [f"Interstitials dismissed by the guard: {split}"]
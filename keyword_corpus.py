@@ -0,0 +1,231 @@
+"""
+Keyword corpus runner: search validation for a large keyword file.
+
+Keywords are streamed from the file one line at a time and each one is
+opened as a results URL in a single warm browser. The page is then put
+through the results / no-results / unknown check (search_results.classify,
+built on the page_state probe TC03 uses). Every result is appended to a
+JSONL file as soon as it's known, so memory stays flat however big the
+corpus is.
+
+A crashed or interrupted run picks up where it left off: the output is
+written in file order, so the last line number in it is all there is to
+resume from. A captcha stops the shard right away, before the keyword is
+recorded, so the rerun retries it.
+
+With --workers N the file is split into N shards (every Nth line). Each
+shard runs in its own process and browser and has its own output file.
+
+Usage:
+    python keyword_corpus.py run keywords.txt --headless
+    python keyword_corpus.py run keywords.txt --workers 4 --headless
+    python keyword_corpus.py summary
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+import deep_links
+import interstitial_guard
+import search_results
+import settings
+
+OUT_DIR = os.path.join(settings.REPO_ROOT, "metrics", "corpus")
+# States that count as a failed keyword
+BAD_STATES = ("unknown", "error")
+# Exit code of a shard stopped by a captcha
+BLOCKED = 2
+
+
+def iter_keywords(path, shard=0, shards=1, after=0):
+    """Yield (line number, keyword) for this shard lazily, skipping blanks,
+    # comments and everything up to line `after`."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line_no <= after or (line_no - 1) % shards != shard:
+                continue
+            keyword = line.strip()
+            if keyword and not keyword.startswith("#"):
+                yield line_no, keyword
+
+
+def out_path(out_dir, keywords_path, shard, shards):
+    name = os.path.splitext(os.path.basename(keywords_path))[0]
+    return os.path.join(out_dir, f"{name}.{shard + 1}of{shards}.jsonl")
+
+
+def last_done(path):
+    """Line number of the last keyword recorded in path (0 if none). A line
+    cut off by a crash is dropped from the file."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        start, tail = size, b""
+        # Enough of the end of the file to hold the last complete line
+        while start > 0 and tail.count(b"\n") < 2:
+            start = max(0, start - 4096)
+            f.seek(start)
+            tail = f.read(size - start)
+        if not tail.endswith(b"\n"):
+            keep = tail.rfind(b"\n") + 1
+            f.truncate(start + keep)
+            tail = tail[:keep]
+    lines = tail.splitlines()
+    last = lines[-1] if lines else b""
+    try:
+        return json.loads(last)["line"] if last else 0
+    except (ValueError, KeyError):
+        return 0
+
+
+def check_keyword(driver, base_url, keyword, timeout):
+    started = time.monotonic()
+    try:
+        driver.get(deep_links.search_url(base_url, keyword))
+        result = search_results.wait_for_state(driver, timeout)
+    except WebDriverException as e:
+        result = {"state": "error", "results": 0, "error": e.msg or type(e).__name__}
+    record = {
+        "keyword": keyword,
+        "state": result["state"],
+        "results": result["results"],
+        "ms": round((time.monotonic() - started) * 1000),
+    }
+    if result["state"] in BAD_STATES:
+        record["page"] = result.get("page")
+        record["url"] = getattr(driver, "current_url", None)
+        record["error"] = result.get("error") or result.get("reason")
+    return record
+
+
+def run_shard(args, shard, shards):
+    from seleniumbase import SB
+
+    path = out_path(args.out_dir, args.keywords, shard, shards)
+    os.makedirs(args.out_dir, exist_ok=True)
+    after = last_done(path)
+    if after:
+        print(f"Resuming {path} after line {after}")
+    done, blocked = 0, False
+    with SB(browser="chrome", headless=args.headless) as sb, open(path, "a") as out:
+        interstitial_guard.install(sb.driver)
+        for line_no, keyword in iter_keywords(args.keywords, shard, shards, after):
+            record = check_keyword(sb.driver, args.base_url, keyword, args.timeout)
+            if record.get("page") == "captcha":
+                print(f"Bot wall at line {line_no} ({keyword!r}); stopping, run again to resume")
+                blocked = True
+                break
+            record["line"] = line_no
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            done += 1
+            if done % 100 == 0:
+                print(f"{done} keywords done (line {line_no})")
+            if args.limit and done >= args.limit:
+                break
+    return path, blocked
+
+
+def fan_out(args):
+    """One process (and browser) per shard; each one resumes on its own."""
+    procs = []
+    for shard in range(args.workers):
+        cmd = [sys.executable, os.path.abspath(__file__), "run", args.keywords,
+               "--shard", f"{shard + 1}/{args.workers}", "--out-dir", args.out_dir,
+               "--timeout", str(args.timeout), "--base-url", args.base_url]
+        if args.limit:
+            cmd += ["--limit", str(args.limit)]
+        if args.headless:
+            cmd.append("--headless")
+        env = dict(os.environ, AMZ_WORKER_ID=f"w{shard + 1}")
+        procs.append(subprocess.Popen(cmd, env=env))
+    codes = [proc.wait() for proc in procs]
+    for shard, code in enumerate(codes, start=1):
+        if code:
+            print(f"Shard {shard} exited with {code}; run again to resume it")
+    paths = [out_path(args.out_dir, args.keywords, shard, args.workers)
+             for shard in range(args.workers)]
+    return paths, BLOCKED in codes
+
+
+def summarize(paths):
+    """State counts, timing and the first few bad keywords, streamed from the
+    result files."""
+    states, bad = {}, []
+    count = total_ms = max_ms = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                states[record["state"]] = states.get(record["state"], 0) + 1
+                count += 1
+                total_ms += record["ms"]
+                max_ms = max(max_ms, record["ms"])
+                if record["state"] in BAD_STATES and len(bad) < 20:
+                    bad.append(record)
+    return {"keywords": count, "states": states, "bad": bad,
+            "mean_ms": total_ms / count if count else 0, "max_ms": max_ms}
+
+
+def print_summary(summary):
+    states = ", ".join(f"{n} {state}" for state, n in sorted(summary["states"].items()))
+    print(f"{summary['keywords']} keywords: {states or 'none'}")
+    print(f"  {summary['mean_ms']:.0f}ms per keyword on average, slowest {summary['max_ms']}ms")
+    for record in summary["bad"]:
+        print(f"  line {record['line']}: {record['keyword']!r} -> {record['state']} "
+              f"({record.get('error') or record.get('url')})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search validation over a keyword corpus")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="check every keyword in the file")
+    run_cmd.add_argument("keywords", help="text file, one keyword per line")
+    run_cmd.add_argument("--workers", type=int, default=1)
+    run_cmd.add_argument("--shard", default=None, help="i/N: run only this shard")
+    run_cmd.add_argument("--out-dir", default=OUT_DIR)
+    run_cmd.add_argument("--limit", type=int, default=None,
+                         help="stop after this many keywords (per shard)")
+    run_cmd.add_argument("--timeout", type=float, default=10,
+                         help="seconds to wait for results or no-results")
+    run_cmd.add_argument("--base-url", default=settings.BASE_URL)
+    run_cmd.add_argument("--headless", action="store_true")
+
+    summary_cmd = sub.add_parser("summary", help="summarize result files")
+    summary_cmd.add_argument(
+        "files", nargs="*", default=sorted(glob.glob(os.path.join(OUT_DIR, "*.jsonl"))),
+    )
+
+    args = parser.parse_args(argv)
+    blocked = False
+    if args.command == "summary":
+        paths = args.files
+    elif args.workers > 1 and not args.shard:
+        paths, blocked = fan_out(args)
+    else:
+        shard, shards = (int(n) for n in (args.shard or "1/1").split("/"))
+        path, blocked = run_shard(args, shard - 1, shards)
+        paths = [path]
+    summary = summarize(paths)
+    print_summary(summary)
+    if blocked:
+        return BLOCKED
+    return 1 if any(summary["states"].get(state) for state in BAD_STATES) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Locator auditor and the :contains() translation cache.
+
+SeleniumBase rewrites jQuery-style selectors such as "a:contains('Electronics')"
+into XPath on every call. install_translation_cache() memoizes that
+translation (and the XPath -> CSS one) for the whole session.
+
+With AMZ_LOCATOR_AUDIT=1 every selector the suite uses is timed in the page
+next to the step that uses it (before actions, after waits), once per test: the mean time to resolve
+it, how many elements matched, and roughly how many elements the engine had
+to look at (the subtree under the selector's #id anchor, or the whole
+document). For each selector two alternatives are timed as well:
+
+  * the CSS form of an XPath selector, when SeleniumBase can convert it
+  * the selector scoped under the nearest ancestor with an id
+
+The fastest alternative that finds the same first element is suggested when
+the original is slow. Results are saved per run/worker, and
+
+    python locator_audit.py report
+
+merges them into one ranking across all test modules.
+"""
+
+import argparse
+import functools
+import glob
+import json
+import os
+import re
+import sys
+
+from selenium.common.exceptions import WebDriverException
+
+import settings
+
+# Steps whose first argument is a selector
+AUDITED_STEPS = (
+    "click", "js_click", "click_if_visible", "type", "send_keys", "hover_on_element",
+    "scroll_to_element", "find_elements", "get_attribute", "get_text",
+    "is_element_visible", "is_element_present", "is_element_enabled",
+    "wait_for_element_visible", "wait_for_element_present",
+    "wait_for_element_clickable", "wait_for_element_not_visible",
+    "assert_element", "assert_element_visible", "assert_element_not_visible",
+)
+# These can navigate away, so their selector is audited before the step runs
+ACTION_STEPS = {"click", "js_click", "click_if_visible", "type", "send_keys", "hover_on_element"}
+
+AUDIT_JS = """
+var candidates = arguments[0], scopeId = arguments[1];
+function run(sel, kind) {
+    if (kind === "css") { return Array.prototype.slice.call(document.querySelectorAll(sel)); }
+    var r = document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var out = [];
+    for (var i = 0; i < r.snapshotLength; i++) { out.push(r.snapshotItem(i)); }
+    return out;
+}
+function time(sel, kind) {
+    var runs = 0, found, start = performance.now();
+    try {
+        do { found = run(sel, kind); runs++; }
+        while (performance.now() - start < 5 && runs < 200);
+    } catch (e) { return null; }
+    return {ms: (performance.now() - start) / runs, found: found};
+}
+function scoped(sel, kind, id) {
+    if (kind === "css") {
+        return sel.indexOf(",") < 0 ? {sel: "#" + CSS.escape(id) + " " + sel, kind: kind} : null;
+    }
+    var anchor = "//*[@id='" + id + "']";
+    var m = sel.match(/^\\((\\/\\/.*)\\)(\\[\\d+\\])$/);
+    if (m) { return {sel: "(" + anchor + m[1] + ")" + m[2], kind: kind}; }
+    return sel.indexOf("//") === 0 ? {sel: anchor + sel, kind: kind} : null;
+}
+var main = time(candidates[0].sel, candidates[0].kind);
+if (!main) { return null; }
+var first = main.found[0] || null;
+var root = scopeId ? document.getElementById(scopeId) : null;
+var result = {
+    ms: main.ms,
+    matches: main.found.length,
+    scanned: (root || document).getElementsByTagName("*").length,
+    alternatives: []
+};
+var tries = candidates.slice(1);
+var holder = first && first.parentElement && first.parentElement.closest("[id]");
+if (holder && holder !== document.body && holder.id !== scopeId) {
+    var s = scoped(candidates[0].sel, candidates[0].kind, holder.id);
+    if (s) { tries.push(s); }
+}
+tries.forEach(function (alt) {
+    var t = time(alt.sel, alt.kind);
+    if (t) {
+        result.alternatives.push({
+            selector: alt.sel, by: alt.kind === "css" ? "css selector" : "xpath",
+            ms: t.ms, matches: t.found.length, same_first: (t.found[0] || null) === first
+        });
+    }
+});
+return result;
+"""
+
+_translators = {}
+
+
+def install_translation_cache():
+    """Memoize SeleniumBase's css <-> xpath translations for the session."""
+    try:
+        from seleniumbase.fixtures import css_to_xpath, xpath_to_css
+    except ImportError:
+        return
+    for module, name in ((css_to_xpath, "convert_css_to_xpath"),
+                         (xpath_to_css, "convert_xpath_to_css")):
+        original = getattr(module, name, None)
+        if original is None or hasattr(original, "cache_info"):
+            continue
+        cached = functools.lru_cache(maxsize=None)(original)
+        setattr(module, name, cached)
+        _translators[name] = cached
+
+
+def translate(name, selector):
+    fn = _translators.get(name)
+    if fn is None:
+        return None
+    try:
+        return fn(selector)
+    except Exception:  # the converters raise plain Exceptions on unsupported input
+        return None
+
+
+def resolve(selector, by):
+    """(selector, kind) the browser actually runs, the way SeleniumBase would."""
+    if by == "xpath" or selector.startswith(("/", "(")):
+        return selector, "xpath"
+    if ":contains(" in selector:
+        xpath = translate("convert_css_to_xpath", selector)
+        return (xpath, "xpath") if xpath else (None, None)
+    if by == "css selector":
+        return selector, "css"
+    return None, None
+
+
+def scope_id(selector, kind):
+    if kind == "css":
+        m = re.match(r"#([\w-]+)", selector)
+    else:
+        m = re.match(r"\(?//\*\[@id=['\"]([\w-]+)['\"]\]", selector)
+    return m.group(1) if m else None
+
+
+class LocatorAudit:
+    def __init__(self):
+        self.locators = {}
+
+    def audit(self, driver, selector, by, module):
+        actual, kind = resolve(selector, by)
+        if actual is None:
+            return None
+        candidates = [{"sel": actual, "kind": kind}]
+        if kind == "xpath":
+            css = translate("convert_xpath_to_css", actual)
+            if css:
+                candidates.append({"sel": css, "kind": "css"})
+        try:
+            result = driver.execute_script(AUDIT_JS, candidates, scope_id(actual, kind))
+        except WebDriverException:
+            return None
+        if not result or not result["matches"]:
+            # Not on the page right now; try again the next time it's used
+            return None
+        entry = self.locators.setdefault(selector, {
+            "selector": selector, "by": by, "resolved": actual if actual != selector else None,
+            "modules": [], "samples": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "matches": 0, "scanned": 0, "suggestion": None,
+        })
+        if module not in entry["modules"]:
+            entry["modules"].append(module)
+        entry["samples"] += 1
+        entry["total_ms"] += result["ms"]
+        entry["max_ms"] = max(entry["max_ms"], result["ms"])
+        entry["matches"] = max(entry["matches"], result["matches"])
+        entry["scanned"] = max(entry["scanned"], result["scanned"])
+        faster = [
+            alt for alt in result["alternatives"]
+            if alt["same_first"] and alt["matches"] and alt["ms"] < result["ms"] * 0.8
+        ]
+        if faster and result["ms"] >= settings.SLOW_LOCATOR_MS:
+            best = min(faster, key=lambda alt: alt["ms"])
+            entry["suggestion"] = {
+                "selector": best["selector"], "by": best["by"],
+                "speedup": result["ms"] / max(best["ms"], 1e-6),
+            }
+        return result
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(list(self.locators.values()), f, indent=2)
+
+    def summary_lines(self, limit=15):
+        return ranked_lines(self.locators.values(), limit)
+
+
+def merge(entries):
+    merged = {}
+    for entry in entries:
+        key = entry["selector"]
+        if key not in merged:
+            merged[key] = dict(entry, modules=list(entry["modules"]))
+            continue
+        m = merged[key]
+        m["modules"] = sorted(set(m["modules"]) | set(entry["modules"]))
+        m["samples"] += entry["samples"]
+        m["total_ms"] += entry["total_ms"]
+        m["max_ms"] = max(m["max_ms"], entry["max_ms"])
+        m["matches"] = max(m["matches"], entry["matches"])
+        m["scanned"] = max(m["scanned"], entry["scanned"])
+        m["suggestion"] = m["suggestion"] or entry["suggestion"]
+    return list(merged.values())
+
+
+def ranked_lines(entries, limit=15):
+    """Slowest selectors first (mean in-page resolution time)."""
+    entries = [e for e in entries if e["samples"]]
+    if not entries:
+        return []
+    entries.sort(key=lambda e: e["total_ms"] / e["samples"], reverse=True)
+    lines = [
+        "Locator audit (slowest first):",
+        f"  {'mean ms':>8} {'max ms':>7} {'uses':>5} {'matches':>7} {'scanned':>7}  selector",
+    ]
+    for e in entries[:limit]:
+        slow = "SLOW " if e["total_ms"] / e["samples"] >= settings.SLOW_LOCATOR_MS else ""
+        lines.append(
+            f"  {e['total_ms'] / e['samples']:8.3f} {e['max_ms']:7.3f} {e['samples']:5d} "
+            f"{e['matches']:7d} {e['scanned']:7d}  {slow}{e['selector']} "
+            f"[{', '.join(e['modules'])}]"
+        )
+        if e["suggestion"]:
+            s = e["suggestion"]
+            lines.append(f"{'':>42}-> {s['selector']} ({s['by']}, {s['speedup']:.1f}x faster)")
+    translated = _translators.get("convert_css_to_xpath")
+    if translated is not None:
+        info = translated.cache_info()
+        lines.append(f"  :contains() translations: {info.currsize} cached, {info.hits} reused")
+    return lines
+
+
+def audited(name, method):
+    """Wrap a BaseCase step so its selector gets audited once per test."""
+    before = name in ACTION_STEPS
+
+    def check(self, args, kwargs):
+        selector = args[0] if args else kwargs.get("selector")
+        if not isinstance(selector, str):
+            return
+        by = kwargs.get("by")
+        if by is None and len(args) > 1 and args[1] in ("css selector", "xpath"):
+            by = args[1]
+        seen = self.__dict__.setdefault("_audited_locators", set())
+        if (selector, by) in seen:
+            return
+        if audit.audit(self.driver, selector, by or "css selector", type(self).__module__):
+            seen.add((selector, by))
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if before:
+            check(self, args, kwargs)
+        result = method(self, *args, **kwargs)
+        if not before:
+            check(self, args, kwargs)
+        return result
+
+    return wrapper
+
+
+def audit_file():
+    suffix = f".{settings.WORKER_ID}" if settings.WORKER_ID else ""
+    return os.path.join(settings.REPO_ROOT, "metrics", f"locator_audit{suffix}.json")
+
+
+audit = LocatorAudit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranked locator audit across all modules")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_cmd = sub.add_parser("report")
+    report_cmd.add_argument(
+        "files", nargs="*",
+        default=glob.glob(os.path.join(settings.REPO_ROOT, "metrics", "locator_audit*.json")),
+    )
+    report_cmd.add_argument("--top", type=int, default=40)
+    args = parser.parse_args(argv)
+    entries = []
+    for path in args.files:
+        with open(path) as f:
+            entries.extend(json.load(f))
+    lines = ranked_lines(merge(entries), args.top)
+    print("\n".join(lines) if lines else "No locator audit results yet")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Browser memory sampling for long sessions (reused browsers, keyword corpora).
+
+Every sample reads JS heap, DOM node count, event listener count and document
+count through CDP Performance.getMetrics. When psutil is installed it also
+adds the RSS of the browser's renderer processes. Samples are appended to one
+JSONL file per browser session. AmazonBaseCase takes one after every test and,
+for the heavy flows that opt in, one every N steps:
+
+    class TestBrowseCategory(AmazonBaseCase):
+        memory_sample_every = 5
+
+    @sample_every(3)
+    def test_case_TC09(self): ...
+
+When the per-test samples of a session keep going up for a whole window and
+the total growth passes the threshold, the session is flagged as leaking, and
+optionally a heap snapshot is written next to the samples.
+"""
+
+import json
+import os
+import time
+import weakref
+
+from selenium.common.exceptions import WebDriverException
+
+import settings
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; samples just have no renderer RSS
+    psutil = None
+
+METRICS = {
+    "JSHeapUsedSize": "js_heap_used",
+    "JSHeapTotalSize": "js_heap_total",
+    "Nodes": "nodes",
+    "JSEventListeners": "listeners",
+    "Documents": "documents",
+}
+
+_profiles = weakref.WeakKeyDictionary()
+
+# Every leak flagged in this process, for the end-of-run summary
+leaks = []
+
+
+def sample_every(steps):
+    """Decorator: sample memory every `steps` steps during this test."""
+    def decorate(test_method):
+        test_method.memory_sample_every = steps
+        return test_method
+    return decorate
+
+
+def renderer_rss(driver):
+    """Total RSS of the renderer processes under this chromedriver, or None."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if psutil is None or process is None:
+        return None
+    try:
+        children = psutil.Process(process.pid).children(recursive=True)
+        return sum(
+            child.memory_info().rss for child in children
+            if "--type=renderer" in " ".join(child.cmdline())
+        )
+    except psutil.Error:
+        return None
+
+
+class SessionProfile:
+    def __init__(self, driver):
+        self.driver = driver
+        name = f"{settings.RUN_ID}-{(driver.session_id or 'session')[:8]}.jsonl"
+        self.path = os.path.join(settings.MEMORY_DIR, name)
+        self.per_test = []
+        self.flagged = False
+        self.available = True
+        try:
+            driver.execute_cdp_cmd("Performance.enable", {})
+        except (AttributeError, WebDriverException):
+            self.available = False
+
+    def sample(self, test_id, label):
+        if not self.available:
+            return None
+        try:
+            result = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        except WebDriverException:
+            return None
+        values = {m["name"]: m["value"] for m in result.get("metrics", [])}
+        record = {key: values.get(name) for name, key in METRICS.items()}
+        record.update(
+            at=time.time(), test=test_id, label=label,
+            renderer_rss=renderer_rss(self.driver),
+        )
+        os.makedirs(settings.MEMORY_DIR, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        if label == "after test":
+            self.per_test.append(record)
+        return record
+
+    def check_growth(self):
+        """Reasons this session looks like it's leaking (empty if it doesn't)."""
+        window = self.per_test[-settings.MEMORY_WINDOW:]
+        if len(window) < settings.MEMORY_WINDOW:
+            return []
+        reasons = []
+        limits = (
+            ("js_heap_used", settings.MEMORY_GROWTH_MB * 1024 * 1024, "MB", 1024 * 1024),
+            ("nodes", settings.MEMORY_NODES_GROWTH, "nodes", 1),
+        )
+        for key, limit, unit, scale in limits:
+            values = [r[key] for r in window]
+            if None in values:
+                continue
+            rising = all(b >= a for a, b in zip(values, values[1:]))
+            if rising and values[-1] - values[0] > limit:
+                reasons.append(
+                    f"{key} grew {(values[-1] - values[0]) / scale:.0f} {unit} "
+                    f"over the last {len(window)} tests"
+                )
+        return reasons
+
+    def heap_snapshot(self):
+        """Write a .heapsnapshot for this tab (needs Selenium's trio/CDP support)."""
+        path = self.path.replace(".jsonl", f"-{len(self.per_test)}.heapsnapshot")
+        try:
+            import trio
+            trio.run(_take_heap_snapshot, self.driver, path)
+        except Exception as e:  # diagnostics only; never fail the test for it
+            print(f"Heap snapshot failed: {e}")
+            return None
+        return path
+
+
+async def _take_heap_snapshot(driver, path):
+    import trio
+
+    async with driver.bidi_connection() as connection:
+        session, devtools = connection.session, connection.devtools
+        with open(path, "w") as f:
+            async def write_chunks():
+                async for event in session.listen(devtools.heap_profiler.AddHeapSnapshotChunk):
+                    f.write(event.chunk)
+
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(write_chunks)
+                await trio.sleep(0)
+                await session.execute(devtools.heap_profiler.enable())
+                await session.execute(
+                    devtools.heap_profiler.take_heap_snapshot(report_progress=False)
+                )
+                # All chunks are sent before the command returns; let the writer catch up
+                await trio.sleep(0.5)
+                nursery.cancel_scope.cancel()
+
+
+def profile_for(driver):
+    profile = _profiles.get(driver)
+    if profile is None:
+        profile = _profiles[driver] = SessionProfile(driver)
+    return profile
+
+
+def after_test(driver, test_id):
+    """Per-test sample plus the growth check; returns the sample."""
+    profile = profile_for(driver)
+    record = profile.sample(test_id, "after test")
+    reasons = profile.check_growth()
+    if reasons and not profile.flagged:
+        profile.flagged = True
+        snapshot = profile.heap_snapshot() if settings.MEMORY_HEAP_SNAPSHOT else None
+        leaks.append({"test": test_id, "reasons": reasons, "snapshot": snapshot,
+                      "samples": profile.path})
+        print(f"Possible memory leak: {'; '.join(reasons)}")
+    return record
+
+
+def describe(record):
+    heap = (record["js_heap_used"] or 0) / 1024 / 1024
+    text = (f"JS heap {heap:.1f} MB, {record['nodes']} nodes, "
+            f"{record['listeners']} listeners, {record['documents']} documents")
+    if record["renderer_rss"]:
+        text += f", renderer RSS {record['renderer_rss'] / 1024 / 1024:.0f} MB"
+    return text
+
+
+def summary_lines():
+    lines = []
+    for leak in leaks:
+        lines.append(f"Possible memory leak by {leak['test']}: {'; '.join(leak['reasons'])}")
+        lines.append(f"  samples: {leak['samples']}")
+        if leak["snapshot"]:
+            lines.append(f"  heap snapshot: {leak['snapshot']}")
+    return lines
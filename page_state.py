@@ -0,0 +1,113 @@
+"""
+Single-probe page-state classifier.
+
+probe() names the page the tab is on from a compact set of DOM signatures,
+checked in one execute_script call. Bot walls and error pages are checked
+first:
+
+    captcha       robot check / "enter the characters you see"
+    error         Amazon's error pages (dogs of Amazon, 5xx/404 responses)
+    redirect      the page ended up on a different host (regional redirect)
+    interstitial  the full-page "Continue shopping" interstitial
+    results       search results with at least one visible card
+    no-results    the "No results for ..." search page
+    product       a product detail page
+    cart          the cart, empty or not
+    home          the gateway (homepage)
+    unknown       none of the above, or the page is still loading
+
+AmazonBaseCase probes after every open() and fails straight away on the
+FATAL states, and expect_page() waits for the states a test expects while
+failing as soon as the new page turns out to be something else. A bot-walled
+run fails in seconds instead of sitting out every timeout.
+"""
+
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+from deep_links import RESULT_SELECTOR
+from interstitial_guard import BLOCKERS
+
+# States no test ever expects: fail the moment one shows up
+FATAL = ("captcha", "error", "redirect")
+
+PROBE_JS = """
+var resultSelector = arguments[0], interstitial = arguments[1], host = arguments[2];
+function shown(el) {
+    return !!el && el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+}
+function any(selector) { return !!document.querySelector(selector); }
+var nav = performance.getEntriesByType("navigation")[0] || {};
+var text = document.body ? document.body.innerText.slice(0, 3000) : "";
+var title = document.title || "";
+var out = {state: "unknown", reason: null, url: location.href, results: 0,
+           ready: document.readyState, doc: performance.timeOrigin};
+function is(state, reason) { out.state = state; out.reason = reason; return out; }
+
+if (any("form[action*='validateCaptcha'], #captchacharacters")
+        || /Robot Check/i.test(title)
+        || /characters you see (below|in this image)|not a robot/i.test(text)) {
+    return is("captcha", "captcha / robot check page");
+}
+if (any("img[alt*='Dogs of Amazon'], a[href*='ref=cs_503_link'], a[href*='ref=cs_404_link']")
+        || /Page Not Found|Something went wrong|Service Unavailable/i.test(title)) {
+    return is("error", "Amazon error page: " + (title || "untitled"));
+}
+if (nav.responseStatus >= 400) {
+    return is("error", "HTTP " + nav.responseStatus);
+}
+var current = location.hostname.replace(/^www\\./, "");
+if (host && /^https?:$/.test(location.protocol) && current !== host) {
+    return is("redirect", "redirected to " + location.hostname);
+}
+if (shown(document.querySelector(interstitial))) {
+    return is("interstitial", "Continue shopping interstitial");
+}
+var cards = document.querySelectorAll(resultSelector);
+if (Array.prototype.some.call(cards, shown)) {
+    out.results = cards.length;
+    return is("results", cards.length + " result cards");
+}
+if (shown(document.querySelector(".s-no-results-info-bar")) || text.indexOf("No results for") >= 0) {
+    return is("no-results", "no results page");
+}
+if (any("#dp #productTitle, #dp-container #productTitle")) { return is("product", "product page"); }
+if (any("#sc-active-cart, .sc-your-amazon-cart-is-empty, #sc-empty-cart")) {
+    return is("cart", "cart page");
+}
+if (any("#gw-layout, #gw-desktop-herotator, #desktop-banner")) { return is("home", "homepage"); }
+return out;
+"""
+
+
+def site_host(url):
+    """Host a page is expected to stay on (without www.)."""
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def probe(driver, expected_url=None):
+    """{"state", "reason", "url", "results", "ready", "doc"} for the current
+    tab. expected_url's host is the one the page should be on (None: any)."""
+    host = site_host(expected_url) if expected_url else None
+    try:
+        return driver.execute_script(
+            PROBE_JS, RESULT_SELECTOR, BLOCKERS["continue-shopping"], host
+        )
+    except WebDriverException as e:
+        # An alert or a tab closing under us; let the caller's waits deal with it
+        return {"state": "unknown", "reason": e.msg or type(e).__name__, "url": None,
+                "results": 0, "ready": "loading", "doc": None}
+
+
+def document_id(driver):
+    """performance.timeOrigin of the tab's document (changes on every load)."""
+    try:
+        return driver.execute_script("return performance.timeOrigin;")
+    except WebDriverException:
+        return None
+
+
+def describe(result):
+    return f"{result['state']} ({result['reason']}) at {result['url']}"
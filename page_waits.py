@@ -0,0 +1,168 @@
+"""
+Event-driven waits used in place of fixed self.sleep() calls.
+
+A tiny watcher is installed in the page the first time we wait on it. It keeps
+track of the last DOM mutation (MutationObserver) and of how many fetch/XHR
+requests are still in flight. The waits below return as soon as the page (or a
+single element) has actually gone quiet; the timeout is only an upper bound.
+"""
+
+import time
+
+from selenium.common.exceptions import (
+    JavascriptException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+DEFAULT_QUIET_MS = 400
+DEFAULT_STABLE_MS = 300
+DEFAULT_TIMEOUT = 10
+
+# Attribute changes that actually matter for layout/interaction. Inline style
+# is left out on purpose: Amazon's carousels rewrite it every few seconds and
+# the page would never count as quiet.
+WATCHED_ATTRIBUTES = ["class", "hidden", "disabled", "aria-hidden", "aria-expanded"]
+
+INSTALL_WATCHER_JS = """
+(function (attributes) {
+    if (window.__settleWatch) { return; }
+    var w = window.__settleWatch = {pending: 0, lastChange: performance.now()};
+    var touch = function () { w.lastChange = performance.now(); };
+    new MutationObserver(touch).observe(document, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: attributes
+    });
+    var origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function () {
+            w.pending++; touch();
+            return origFetch.apply(this, arguments).finally(function () {
+                w.pending--; touch();
+            });
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        w.pending++; touch();
+        this.addEventListener("loadend", function () {
+            w.pending--; touch();
+        }, {once: true});
+        try {
+            return origSend.apply(this, arguments);
+        } catch (e) {
+            // No loadend will ever come for a send that threw (InvalidStateError, ...)
+            w.pending--;
+            throw e;
+        }
+    };
+})(%s);
+""" % (WATCHED_ATTRIBUTES,)
+
+PAGE_SETTLED_JS = INSTALL_WATCHER_JS + """
+var quietMs = arguments[0], budgetMs = arguments[1];
+var done = arguments[arguments.length - 1];
+var w = window.__settleWatch, start = performance.now();
+(function check() {
+    var now = performance.now(), idle = now - w.lastChange;
+    var settled = document.readyState === "complete" && w.pending <= 0 && idle >= quietMs;
+    if (settled || now - start >= budgetMs) {
+        done({settled: settled, waited_ms: now - start, pending: w.pending, idle_ms: idle});
+        return;
+    }
+    // Sleep until the quiet window could be over; a new mutation just pushes it out again
+    var next = w.pending > 0 ? 50 : Math.max(quietMs - idle, 16);
+    setTimeout(check, Math.min(next, budgetMs - (now - start)));
+})();
+"""
+
+ELEMENT_STABLE_JS = """
+var el = arguments[0], stableMs = arguments[1], budgetMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = performance.now(), since = start, last = null;
+(function check() {
+    var now = performance.now();
+    if (!el.isConnected) {
+        done({stable: false, detached: true, waited_ms: now - start});
+        return;
+    }
+    var r = el.getBoundingClientRect();
+    var box = [r.x, r.y, r.width, r.height].join(",");
+    if (box !== last) { last = box; since = now; }
+    var stable = r.width > 0 && r.height > 0 && now - since >= stableMs;
+    if (stable || now - start >= budgetMs) {
+        done({stable: stable, detached: false, waited_ms: now - start});
+        return;
+    }
+    requestAnimationFrame(check);
+})();
+"""
+
+
+def run_async(driver, script, budget_s, *args):
+    """execute_async_script with the script timeout raised for this one call.
+    The driver gets a little slack over the in-page budget so the page always
+    reports back first; the old timeout is put back afterwards, as the browser
+    (and its timeouts) can outlive the test."""
+    previous = driver.timeouts.script
+    driver.set_script_timeout(budget_s + 5)
+    try:
+        return driver.execute_async_script(script, *args)
+    finally:
+        driver.set_script_timeout(previous)
+
+
+def wait_for_page_settled(driver, quiet_ms=DEFAULT_QUIET_MS, timeout=DEFAULT_TIMEOUT):
+    """Block until the document is complete, no fetch/XHR is pending and the
+    DOM has not changed for quiet_ms. Returns the last in-page report; never
+    raises on timeout, callers follow up with their own explicit waits."""
+    start = time.monotonic()
+    deadline = start + timeout
+    report = {"settled": False, "pending": None, "idle_ms": 0}
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            report = run_async(
+                driver, PAGE_SETTLED_JS, remaining, quiet_ms, remaining * 1000
+            )
+            break
+        except (JavascriptException, TimeoutException):
+            # The document was swapped out mid-wait (navigation); re-arm the
+            # watcher on the new one.
+            continue
+        except WebDriverException as e:
+            if "unload" not in str(e).lower():
+                raise
+    report["waited_ms"] = (time.monotonic() - start) * 1000
+    return report
+
+
+def wait_for_element_stable(driver, find_element, stable_ms=DEFAULT_STABLE_MS,
+                            timeout=DEFAULT_TIMEOUT):
+    """Block until the element's bounding box stops moving for stable_ms.
+
+    find_element(remaining_timeout) must return a fresh WebElement; it is called
+    again whenever the element gets re-rendered (detached) while we wait.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    report = {"stable": False, "detached": False}
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        element = find_element(remaining)
+        try:
+            report = run_async(
+                driver, ELEMENT_STABLE_JS, remaining,
+                element, stable_ms, remaining * 1000
+            )
+        except StaleElementReferenceException:
+            continue
+        if not report.get("detached"):
+            break
+    report["waited_ms"] = (time.monotonic() - start) * 1000
+    return report
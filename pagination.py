@@ -0,0 +1,113 @@
+"""
+Pagination walker.
+
+Reads the links in span.s-pagination-strip on the current results page,
+loads pages 2..N together in background tabs (see tabs.py), and checks the
+combined result sets: products repeated across pages, pages that came back
+empty, and result cards without an ASIN. Every page's load latency comes
+from its own Navigation Timing entry.
+"""
+
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import search_results
+import tabs
+from deep_links import RESULT_SELECTOR
+
+STRIP_JS = """
+var strip = document.querySelector("span.s-pagination-strip");
+if (!strip) { return null; }
+var links = {}, last = 1, current = 1;
+strip.querySelectorAll("a, span").forEach(function (el) {
+    var n = parseInt(el.textContent.trim(), 10);
+    if (isNaN(n)) { return; }
+    last = Math.max(last, n);
+    if (el.classList.contains("s-pagination-selected")) { current = n; }
+    if (el.tagName === "A" && el.href) { links[n] = el.href; }
+});
+var next = strip.querySelector("a.s-pagination-next");
+return {links: links, last: last, current: current, next: next ? next.href : null};
+"""
+
+
+def read_strip(driver):
+    """Page links, current page and last page from the pagination strip."""
+    strip = driver.execute_script(STRIP_JS)
+    if strip:
+        strip["links"] = {int(n): href for n, href in strip["links"].items()}
+    return strip
+
+
+def with_page(url, page):
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_urls(strip, pages):
+    """URLs for pages 2..pages. The strip only shows a few numbers (1 2 3 ... 20),
+    so pages without a link of their own reuse a neighbour's link as a template."""
+    template = strip["next"] or next(iter(strip["links"].values()), None)
+    if template is None:
+        return {}
+    last = min(pages, strip["last"])
+    return {n: strip["links"].get(n) or with_page(template, n) for n in range(2, last + 1)}
+
+
+def walk(driver, pages, timeout=20):
+    """Load pages 1..pages of the current results and check them together.
+
+    Returns {"pages": [{"page", "url", "results", "timing", "error"}, ...],
+             "duplicates": [asin, ...], "empty": [page, ...],
+             "missing_asin": {page: count}, "wall_ms": float}"""
+    strip = read_strip(driver)
+    if strip is None:
+        raise ValueError("No pagination strip on this page")
+
+    first = {
+        "page": strip["current"],
+        "url": driver.current_url,
+        "results": search_results.extract(driver),
+        "timing": tabs.current_timing(driver),
+        "error": None,
+    }
+    urls = page_urls(strip, pages)
+    started = time.monotonic()
+    loaded = tabs.load_in_tabs(
+        driver, list(urls.values()), RESULT_SELECTOR, search_results.extract, timeout
+    )
+    wall_ms = (time.monotonic() - started) * 1000
+
+    walked = [first] + [
+        {"page": n, "url": page["url"], "results": page["data"] or [],
+         "timing": page["timing"], "error": page["error"]}
+        for n, page in zip(urls, loaded)
+    ]
+    return {
+        "pages": walked,
+        "duplicates": search_results.duplicate_asins([p["results"] for p in walked]),
+        "empty": [p["page"] for p in walked if not p["results"]],
+        "missing_asin": {
+            p["page"]: sum(1 for r in p["results"] if not r["asin"])
+            for p in walked if any(not r["asin"] for r in p["results"])
+        },
+        "wall_ms": wall_ms,
+    }
+
+
+def latency_lines(report):
+    lines = []
+    for p in report["pages"]:
+        if p["error"]:
+            lines.append(f"  page {p['page']}: failed ({p['error']})")
+            continue
+        t = p["timing"] or {}
+        lines.append(
+            f"  page {p['page']}: {len(p['results'])} results, "
+            f"TTFB {t.get('ttfb_ms') or 0:.0f}ms, "
+            f"DOMContentLoaded {t.get('dom_content_loaded_ms') or 0:.0f}ms"
+        )
+    lines.append(f"  tabs loaded in {report['wall_ms']:.0f}ms wall time")
+    return lines
@@ -0,0 +1,160 @@
+"""
+Fast mode: block images, ads, analytics beacons, ... for tests that don't
+assert on them.
+
+Blocking is done by the browser itself through CDP Network.setBlockedURLs, so
+blocked requests never leave Chrome. Opt in per class or per test:
+
+    class TestPaginate(AmazonBaseCase):
+        block_resources = ("images", "ads", "analytics")
+
+    @block_resources("ads", "*/some/widget.js")
+    def test_case_TC99(self): ...
+
+Entries are either a group name from BLOCK_GROUPS or a raw URL pattern
+(CDP wildcard syntax). AMZ_BLOCK_RESOURCES=0 switches fast mode off for the
+whole run, which is also how the per-test byte/request baseline used for the
+"saved" report gets recorded. The report itself needs AMZ_RESOURCE_REPORT=1
+(on both runs), as counting requests means reading Chrome's CDP log.
+"""
+
+import json
+
+from selenium.common.exceptions import WebDriverException
+
+import settings
+
+# Resource types are matched by URL since Network.setBlockedURLs only knows patterns
+BLOCK_GROUPS = {
+    "images": [
+        "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    ],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.ts?*", "*.mp3*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*"],
+    "ads": [
+        "*amazon-adsystem.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*/aax2/*", "*/e/xsp/*",
+    ],
+    "analytics": [
+        "*fls-na.amazon.com*", "*unagi.amazon.com*", "*unagi-na.amazon.com*",
+        "*/uedata*", "*/rd/uedata*", "*/1/batch/1/OE/*", "*google-analytics.com*",
+        "*googletagmanager.com*",
+    ],
+}
+
+
+def block_resources(*entries):
+    """Decorator: turn on fast mode for a single test."""
+    def decorate(test_method):
+        test_method.block_resources = entries
+        return test_method
+    return decorate
+
+
+def patterns_for(entries):
+    patterns = []
+    for entry in entries or ():
+        patterns.extend(BLOCK_GROUPS.get(entry, [entry]))
+    return sorted(set(patterns))
+
+
+def apply(driver, patterns):
+    """Set the blocked URL list for this browser (an empty list unblocks)."""
+    if getattr(driver, "_blocked_patterns", []) == patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except (AttributeError, WebDriverException):
+        print("Fast mode needs a Chromium browser; running with all resources")
+        return
+    driver._blocked_patterns = patterns
+
+
+class ResourceMeter:
+    """CDP event subscriber counting what a test downloaded and what got blocked."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = 0
+
+    def __call__(self, method, params):
+        if method == "Network.loadingFinished":
+            self.requests += 1
+            self.bytes += int(params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            self.blocked += 1
+
+
+class SavingsReport:
+    """Compares fast-mode tests with the same test's last unblocked run."""
+
+    def __init__(self, baseline_path):
+        self.baseline_path = baseline_path
+        self.baseline = self._load()
+        self.results = []
+        self._updated = {}
+
+    def _load(self):
+        try:
+            with open(self.baseline_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def add(self, test_id, meter, blocking):
+        if not blocking:
+            self._updated[test_id] = {"requests": meter.requests, "bytes": meter.bytes}
+            return None
+        base = self.baseline.get(test_id)
+        result = {
+            "test": test_id,
+            "blocked": meter.blocked,
+            "requests": meter.requests,
+            "bytes": meter.bytes,
+            "requests_saved": base["requests"] - meter.requests if base else None,
+            "bytes_saved": base["bytes"] - meter.bytes if base else None,
+        }
+        self.results.append(result)
+        return result
+
+    def save(self):
+        if not self._updated:
+            return
+        # Re-read first so parallel workers don't drop each other's entries
+        baseline = self._load()
+        baseline.update(self._updated)
+        with open(self.baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        self.baseline = baseline
+        self._updated = {}
+
+    def summary_lines(self):
+        if not self.results:
+            return []
+        lines = ["Fast mode (blocked resources):"]
+        for r in self.results:
+            if r["bytes_saved"] is None:
+                saved = "no unblocked baseline yet"
+            else:
+                saved = (f"saved {r['bytes_saved'] / 1e6:.1f} MB, "
+                         f"{r['requests_saved']} requests")
+            lines.append(
+                f"  {r['test']}: {r['blocked']} blocked, "
+                f"{r['bytes'] / 1e6:.1f} MB in {r['requests']} requests ({saved})"
+            )
+        return lines
+
+
+def describe(result):
+    if result["bytes_saved"] is None:
+        return f"blocked {result['blocked']} requests (no unblocked baseline yet)"
+    return (f"blocked {result['blocked']} requests, saved "
+            f"{result['bytes_saved'] / 1e6:.1f} MB / {result['requests_saved']} requests")
+
+
+savings = SavingsReport(settings.RESOURCE_BASELINE_FILE)
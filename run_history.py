@@ -0,0 +1,321 @@
+"""
+Run history: an SQLite database of every run's tests, waits and page loads.
+
+During a run everything is only appended to in-memory lists:
+
+  * per test: outcome and duration (setup + call + teardown), from conftest
+  * per wait: step, selector, duration and whether it timed out, from the
+    step trace (so only with AMZ_TRACE on)
+  * per page load: TTFB, DOMContentLoaded, load, LCP, CLS, from web_vitals
+  * the environment: host, platform, Python/Selenium/browser versions,
+    base URL, fast mode, git commit
+
+At the end of the session it is written in one transaction with one
+executemany per table, so a run pays a few milliseconds for it. Parallel
+workers write their own rows into the same file (SQLite serializes them).
+
+    python run_history.py trend test_search_filter.py::TestSearchFilter::test_case_TC09
+    python run_history.py drift --days 7 --baseline-days 28
+    python run_history.py slower --threshold 0.2
+    python run_history.py waits --selector "span.s-pagination-strip"
+"""
+
+import argparse
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+
+import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT NOT NULL, worker TEXT NOT NULL, started_at REAL, finished_at REAL,
+    host TEXT, platform TEXT, python TEXT, selenium TEXT, browser TEXT,
+    base_url TEXT, fast_mode INTEGER, git_commit TEXT,
+    PRIMARY KEY (run_id, worker)
+);
+CREATE TABLE IF NOT EXISTS tests (
+    run_id TEXT NOT NULL, worker TEXT, test_id TEXT NOT NULL, suite TEXT,
+    outcome TEXT, duration_s REAL, finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS waits (
+    run_id TEXT NOT NULL, test_id TEXT NOT NULL, suite TEXT, step TEXT,
+    selector TEXT, duration_ms REAL, ok INTEGER, at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    run_id TEXT NOT NULL, test_id TEXT NOT NULL, url TEXT, page_type TEXT,
+    ttfb_ms REAL, dom_content_loaded_ms REAL, load_ms REAL, lcp_ms REAL, cls REAL, at REAL
+);
+CREATE INDEX IF NOT EXISTS tests_by_test ON tests (test_id, finished_at);
+CREATE INDEX IF NOT EXISTS tests_by_date ON tests (finished_at);
+CREATE INDEX IF NOT EXISTS waits_by_selector ON waits (selector, at);
+CREATE INDEX IF NOT EXISTS waits_by_suite ON waits (suite, selector, at);
+CREATE INDEX IF NOT EXISTS waits_by_test ON waits (test_id, at);
+CREATE INDEX IF NOT EXISTS pages_by_test ON pages (test_id, at);
+"""
+
+
+def node_id(test_id):
+    """unittest id (module.Class.method) -> pytest node id (module.py::Class::method)."""
+    if "::" in test_id:
+        return test_id
+    module, cls, method = test_id.rsplit(".", 2)
+    return f"{module.replace('.', '/')}.py::{cls}::{method}"
+
+
+def suite_of(test_id):
+    """module.py::Class for a node id."""
+    return test_id.rsplit("::", 1)[0]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.REPO_ROOT,
+                             capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+class RunHistory:
+    def __init__(self):
+        self.started_at = time.time()
+        self.env = {}
+        self.tests = {}
+        self.waits = []
+        self.pages = []
+
+    def add_environment(self, driver):
+        """Browser details, taken from the first driver of the run."""
+        if self.env:
+            return
+        caps = getattr(driver, "capabilities", None) or {}
+        try:
+            import selenium
+            selenium_version = selenium.__version__
+        except (ImportError, AttributeError):
+            selenium_version = None
+        self.env = {
+            "browser": f"{caps.get('browserName', '')} {caps.get('browserVersion', '')}".strip(),
+            "selenium": selenium_version,
+        }
+
+    def add_report(self, report):
+        """One pytest phase report (setup/call/teardown) of a test."""
+        test = self.tests.setdefault(report.nodeid, {"outcome": "passed", "duration": 0.0})
+        test["duration"] += report.duration
+        if report.failed:
+            # A teardown error after a failed call doesn't hide the failure
+            if report.when == "call":
+                test["outcome"] = "failed"
+            elif test["outcome"] != "failed":
+                test["outcome"] = "error"
+        elif report.skipped and test["outcome"] == "passed":
+            test["outcome"] = "skipped"
+
+    def add_waits(self, test_id, tracer):
+        """Wait spans of a finished test's step trace, top-level or inside a
+        step such as open_search_results. A wait inside another wait (an
+        assert_* calling wait_for_*) is left out so it isn't counted twice."""
+        test_id = node_id(test_id)
+        suite = suite_of(test_id)
+        now = time.time()
+        origin_ns = time.perf_counter_ns()
+        # Spans are recorded as they finish, so walking them backwards every
+        # parent comes before its children
+        open_spans = []
+        for i in range(len(tracer.spans) - 1, -1, -1):
+            name, cat, target, start, end, depth = tracer.spans[i]
+            while open_spans and open_spans[-1][0] >= depth:
+                open_spans.pop()
+            parent_cat = open_spans[-1][1] if open_spans else None
+            open_spans.append((depth, cat))
+            if cat == "wait" and parent_cat != "wait":
+                self.waits.append((
+                    settings.RUN_ID, test_id, suite, name, target, (end - start) / 1e6,
+                    int(i not in tracer.failed), now - (origin_ns - end) / 1e9,
+                ))
+
+    def add_pages(self, test_id, records):
+        """Page-load records from web_vitals."""
+        test_id = node_id(test_id)
+        for r in records:
+            self.pages.append((
+                settings.RUN_ID, test_id, r["url"], r["page_type"], r.get("ttfb_ms"),
+                r.get("dom_content_loaded_ms"), r.get("load_ms"), r.get("lcp_ms"),
+                r.get("cls"), time.time(),
+            ))
+
+    def save(self, path):
+        if not self.tests:
+            return
+        finished_at = time.time()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=60)
+        try:
+            with conn:
+                conn.executescript(SCHEMA)
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (settings.RUN_ID, settings.WORKER_ID, self.started_at, finished_at,
+                     platform.node(), platform.platform(), platform.python_version(),
+                     self.env.get("selenium"), self.env.get("browser"), settings.BASE_URL,
+                     int(settings.BLOCK_RESOURCES), _git_commit()),
+                )
+                conn.executemany(
+                    "INSERT INTO tests VALUES (?,?,?,?,?,?,?)",
+                    [(settings.RUN_ID, settings.WORKER_ID, test_id, suite_of(test_id),
+                      t["outcome"], round(t["duration"], 3), finished_at)
+                     for test_id, t in self.tests.items()],
+                )
+                conn.executemany("INSERT INTO waits VALUES (?,?,?,?,?,?,?,?)", self.waits)
+                conn.executemany("INSERT INTO pages VALUES (?,?,?,?,?,?,?,?,?,?)", self.pages)
+        finally:
+            conn.close()
+
+
+history = RunHistory()
+
+
+# -- report -----------------------------------------------------------------
+
+def connect(path):
+    if not os.path.exists(path):
+        sys.exit(f"No run history at {path} yet")
+    return sqlite3.connect(path)
+
+
+def _window(days_ago_start, days_ago_end):
+    now = time.time()
+    return now - days_ago_start * 86400, now - days_ago_end * 86400
+
+
+def trend(conn, test_id, days):
+    """Duration per run of one test, oldest first."""
+    since, _ = _window(days, 0)
+    rows = conn.execute(
+        "SELECT run_id, outcome, duration_s, finished_at FROM tests "
+        "WHERE test_id = ? AND finished_at >= ? ORDER BY finished_at", (test_id, since),
+    ).fetchall()
+    if not rows:
+        print(f"No runs of {test_id} in the last {days} days")
+        return
+    top = max(r[2] for r in rows) or 1
+    print(f"{test_id}, last {days} days:")
+    for run_id, outcome, duration, finished_at in rows:
+        day = time.strftime("%Y-%m-%d %H:%M", time.localtime(finished_at))
+        bar = "#" * int(40 * duration / top)
+        print(f"  {day}  {run_id:<16} {duration:7.1f}s {outcome:<7} {bar}")
+
+
+def _p95_by(conn, sql, since, until):
+    values = {}
+    for key, value in conn.execute(sql, (since, until)):
+        values.setdefault(key, []).append(value)
+    return {key: (percentile(v, 0.95), len(v)) for key, v in values.items()}
+
+
+def drift(conn, days, baseline_days, threshold, min_samples, what="tests"):
+    """p95 over the last `days` against the `baseline_days` before them.
+    Returns [(key, old p95, new p95, relative change)], biggest drift first."""
+    if what == "tests":
+        sql = ("SELECT test_id, duration_s FROM tests WHERE outcome = 'passed' "
+               "AND finished_at >= ? AND finished_at < ?")
+    else:
+        sql = ("SELECT suite || ' ' || selector, duration_ms FROM waits "
+               "WHERE ok = 1 AND selector IS NOT NULL AND at >= ? AND at < ?")
+    recent = _p95_by(conn, sql, *_window(days, 0))
+    baseline = _p95_by(conn, sql, *_window(days + baseline_days, days))
+    rows = []
+    for key, (new, n_new) in recent.items():
+        old, n_old = baseline.get(key, (None, 0))
+        if old and n_new >= min_samples and n_old >= min_samples:
+            rows.append((key, old, new, (new - old) / old))
+    rows.sort(key=lambda r: r[3], reverse=True)
+    return [r for r in rows if abs(r[3]) >= threshold]
+
+
+def print_drift(rows, unit, only_slower=False):
+    if only_slower:
+        rows = [r for r in rows if r[3] > 0]
+    if not rows:
+        print("  nothing moved past the threshold")
+    for key, old, new, change in rows:
+        print(f"  {change:+7.0%}  p95 {old:8.2f}{unit} -> {new:8.2f}{unit}  {key}")
+
+
+def waits(conn, selector, suite, days):
+    """p50/p95/p99 and timeouts per (suite, selector)."""
+    since, _ = _window(days, 0)
+    sql = "SELECT suite, selector, duration_ms, ok FROM waits WHERE at >= ?"
+    params = [since]
+    if selector:
+        sql += " AND selector = ?"
+        params.append(selector)
+    if suite:
+        sql += " AND suite LIKE ?"
+        params.append(f"%{suite}%")
+    groups = {}
+    for s, sel, ms, ok in conn.execute(sql, params):
+        group = groups.setdefault((s, sel), [[], 0])
+        if ok:
+            group[0].append(ms)
+        else:
+            group[1] += 1
+    print(f"{'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'timeouts':>8}  suite / selector")
+    for (s, sel), (values, timeouts) in sorted(groups.items(), key=lambda kv: -len(kv[1][0])):
+        cells = " ".join(f"{percentile(values, q) or 0:8.0f}" for q in (0.5, 0.95, 0.99))
+        print(f"{len(values):5d} {cells} {timeouts:8d}  {s} {sel}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trends and drift from the run history")
+    parser.add_argument("--db", default=settings.RUN_HISTORY_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    trend_cmd = sub.add_parser("trend", help="duration of one test run by run")
+    trend_cmd.add_argument("test_id")
+    trend_cmd.add_argument("--days", type=int, default=30)
+
+    for name, help_text in (("drift", "p95 drift of tests and waits"),
+                            ("slower", "tests and waits that got slower")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--days", type=int, default=7, help="recent window")
+        cmd.add_argument("--baseline-days", type=int, default=28,
+                         help="window before it to compare against")
+        cmd.add_argument("--threshold", type=float, default=0.2)
+        cmd.add_argument("--min-samples", type=int, default=3)
+
+    waits_cmd = sub.add_parser("waits", help="wait latency percentiles per selector")
+    waits_cmd.add_argument("--selector")
+    waits_cmd.add_argument("--suite")
+    waits_cmd.add_argument("--days", type=int, default=30)
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    if args.command == "trend":
+        trend(conn, args.test_id, args.days)
+    elif args.command == "waits":
+        waits(conn, args.selector, args.suite, args.days)
+    else:
+        slower = args.command == "slower"
+        for what, unit in (("tests", "s"), ("waits", "ms")):
+            print(f"{what.capitalize()}, last {args.days} days vs the {args.baseline_days} before:")
+            print_drift(drift(conn, args.days, args.baseline_days, args.threshold,
+                              args.min_samples, what), unit, slower)
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Run the suite across N worker processes, each with its own browser.
+
+Tests are split into shards using the durations recorded by previous runs
+(longest-processing-time first: the slowest tests are placed first, each on the
+currently lightest worker), so every worker finishes at about the same time.
+Tests we have no timing for yet get the average of the known ones.
+
+Each worker runs in its own scratch directory under .parallel/ so SeleniumBase's
+logs don't collide, and saves its screenshots to "Test Case Screenshots/<worker>".
+
+Usage:
+    python run_parallel.py -n 8
+    python run_parallel.py -n 4 test_paginate.py test_search_filter.py -- --headless
+"""
+
+import argparse
+import heapq
+import os
+import subprocess
+import sys
+import time
+
+import durations
+import settings
+import web_vitals
+
+DEFAULT_DURATION = 60.0
+WORK_DIR = os.path.join(settings.REPO_ROOT, ".parallel")
+
+
+def collect(paths, pytest_args):
+    """Ask pytest for the test ids without running anything."""
+    cmd = [sys.executable, "-m", "pytest", "--collect-only", "-q",
+           f"--rootdir={settings.REPO_ROOT}", *paths, *pytest_args]
+    out = subprocess.run(
+        cmd, cwd=settings.REPO_ROOT, capture_output=True, text=True
+    )
+    test_ids = [line.strip() for line in out.stdout.splitlines() if "::" in line]
+    if not test_ids:
+        sys.exit(f"Could not collect any tests:\n{out.stdout}{out.stderr}")
+    return test_ids
+
+
+def plan_shards(test_ids, known, workers):
+    """Longest-processing-time scheduling; returns [(expected_seconds, [ids])]."""
+    fallback = sum(known.values()) / len(known) if known else DEFAULT_DURATION
+    weighted = sorted(
+        ((known.get(test_id, fallback), test_id) for test_id in test_ids),
+        reverse=True,
+    )
+    heap = [(0.0, i) for i in range(min(workers, len(test_ids)))]
+    shards = [[0.0, []] for _ in heap]
+    for duration, test_id in weighted:
+        load, i = heapq.heappop(heap)
+        shards[i][0] = load + duration
+        shards[i][1].append(test_id)
+        heapq.heappush(heap, (shards[i][0], i))
+    return [(expected, ids) for expected, ids in shards]
+
+
+def start_worker(index, test_ids, pytest_args):
+    worker_id = f"w{index}"
+    cwd = os.path.join(WORK_DIR, worker_id)
+    os.makedirs(cwd, exist_ok=True)
+    env = dict(os.environ, AMZ_WORKER_ID=worker_id, AMZ_RUN_ID=settings.RUN_ID)
+    log = open(os.path.join(cwd, "pytest.log"), "w")
+    ids = [os.path.join(settings.REPO_ROOT, test_id) for test_id in test_ids]
+    cmd = [sys.executable, "-m", "pytest", f"--rootdir={settings.REPO_ROOT}",
+           "-p", "no:cacheprovider", *ids, *pytest_args]
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return worker_id, proc, log
+
+
+def gate_vitals():
+    """LCP gate (or baseline update) over every worker's pages of this run."""
+    store = web_vitals.store
+    store.load_run(settings.RUN_ID)
+    for line in store.summary_lines():
+        print(line)
+    if settings.VITALS_UPDATE_BASELINE:
+        store.save_baseline()
+        return 0
+    failures = store.gate()
+    for failure in failures:
+        print(f"LCP REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+def run_exit_code(codes):
+    """Exit code of the whole run from the workers' codes. A worker killed by
+    a signal has a negative code (-9 for an OOM kill) and fails the run too."""
+    failed = [code if code > 0 else 1 for code in codes if code != 0]
+    return max(failed, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("paths", nargs="*", default=[],
+                        help="test files/ids to run (default: the whole suite)")
+    argv = sys.argv[1:] if argv is None else argv
+    pytest_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, pytest_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    test_ids = collect(args.paths, pytest_args)
+    known = durations.load(settings.DURATIONS_FILE)
+    shards = plan_shards(test_ids, known, max(args.workers, 1))
+
+    print(f"Running {len(test_ids)} tests on {len(shards)} workers")
+    started = time.monotonic()
+    running = []
+    for index, (expected, ids) in enumerate(shards):
+        running.append((expected, *start_worker(index, ids, pytest_args)))
+        print(f"  w{index}: {len(ids)} tests, ~{expected:.0f}s expected")
+
+    codes = []
+    for expected, worker_id, proc, log in running:
+        code = proc.wait()
+        log.close()
+        took = time.monotonic() - started
+        status = "passed" if code == 0 else f"exit code {code}"
+        print(f"  {worker_id}: {status} after {took:.0f}s "
+              f"(log: .parallel/{worker_id}/pytest.log)")
+        codes.append(code)
+
+    exit_code = run_exit_code(codes)
+    durations.merge_worker_files(settings.DURATIONS_FILE)
+    if settings.VITALS:
+        exit_code = max(exit_code, gate_vitals())
+    print(f"Finished in {time.monotonic() - started:.0f}s, "
+          f"expected ~{max(e for e, _ in shards):.0f}s")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
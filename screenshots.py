@@ -0,0 +1,159 @@
+"""
+Background screenshot pipeline.
+
+save_screenshot() only grabs the PNG buffer from the browser; hashing the
+frame, re-compressing it and writing it to disk happen on a small thread pool
+so the test can move on straight away. A frame identical to the previous one
+in the same folder (e.g. "before" and "after" a scroll that didn't move
+anything) is stored once and hard-linked under the second name.
+
+With AMZ_SCREENSHOT_MASKS=1 each full-page frame gets a sidecar
+<name>.png.mask.json with the on-screen boxes of ads, prices and other
+content that changes between runs, which visual_diff.py leaves out of the
+comparison. It's off by default as it costs a script call per frame.
+
+AMZ_SCREENSHOTS picks when frames are kept:
+    always       every frame (default)
+    on-failure   frames are held in memory and only written if the test fails
+    sampled:0.2  a stable ~20% sample (same frames are picked on every run)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; frames are written as captured
+    Image = None
+
+# Content that legitimately differs from run to run
+MASK_SELECTORS = (
+    ".AdHolder", "[data-ad-details]", "[id^='ape_']", "iframe[id*='ad']", "#nav-swmslot",
+    ".a-price", ".a-color-price", "#corePrice_feature_div", "#nav-global-location-slot",
+    ".a-carousel-viewport", "#nav-cart-count",
+)
+
+# Boxes (in screenshot pixels) of visible MASK_SELECTORS matches
+MASK_JS = """
+var ratio = window.devicePixelRatio || 1, boxes = [];
+document.querySelectorAll(arguments[0]).forEach(function (el) {
+    var r = el.getBoundingClientRect();
+    if (r.width < 1 || r.height < 1 || r.bottom < 0 || r.right < 0
+            || r.top > innerHeight || r.left > innerWidth) { return; }
+    boxes.push([Math.max(0, Math.floor(r.left * ratio)), Math.max(0, Math.floor(r.top * ratio)),
+                Math.ceil(r.width * ratio), Math.ceil(r.height * ratio)]);
+});
+return boxes;
+"""
+
+ALWAYS = "always"
+ON_FAILURE = "on-failure"
+SAMPLED = "sampled"
+
+
+def parse_policy(value):
+    """'sampled:0.2' -> ('sampled', 0.2); anything else -> (policy, 1.0)."""
+    value = (value or ALWAYS).strip().lower()
+    name, _, rate = value.partition(":")
+    if name not in (ALWAYS, ON_FAILURE, SAMPLED):
+        raise ValueError(f"Unknown screenshot policy: {value!r}")
+    return name, float(rate) if rate else (0.25 if name == SAMPLED else 1.0)
+
+
+def is_sampled(key, rate):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") / 2 ** 32 < rate
+
+
+class ScreenshotWriter:
+    def __init__(self, workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shots")
+        self._lock = threading.Lock()
+        # folder -> (digest, path, future) of the last frame written there
+        self._last = {}
+        # (path, future) of every write not yet known to have succeeded
+        self._futures = []
+        self.written = 0
+        self.deduplicated = 0
+
+    def submit(self, path, png, masks=None):
+        with self._lock:
+            # Forget frames that are safely on disk; failures stay for close()
+            self._futures = [(p, f) for p, f in self._futures if not f.done() or f.exception()]
+        if masks is not None:
+            mask_future = self._pool.submit(self._write_masks, path, masks)
+            with self._lock:
+                self._futures.append((path + ".mask.json", mask_future))
+        digest = hashlib.blake2b(png, digest_size=16).hexdigest()
+        folder = os.path.dirname(path)
+        with self._lock:
+            previous = self._last.get(folder)
+            if previous and previous[0] == digest and previous[1] != path:
+                future = self._pool.submit(self._link, previous[1], previous[2], path)
+                self.deduplicated += 1
+            else:
+                future = self._pool.submit(self._write, path, png)
+                self.written += 1
+            self._last[folder] = (digest, path, future)
+            self._futures.append((path, future))
+        return future
+
+    def _write(self, path, png):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".part"
+        if Image is not None:
+            with Image.open(BytesIO(png)) as image:
+                image.save(tmp, format="PNG", optimize=True)
+        else:
+            with open(tmp, "wb") as f:
+                f.write(png)
+        os.replace(tmp, path)
+
+    def _write_masks(self, path, masks):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".mask.json", "w") as f:
+            json.dump(masks, f)
+
+    def _link(self, source, source_future, path):
+        source_future.result()
+        if os.path.exists(path):
+            os.remove(path)
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+
+    def close(self):
+        """Wait for every pending frame to hit the disk; returns [(path, error)]
+        for the ones that didn't make it."""
+        self._pool.shutdown(wait=True)
+        failures = [(path, f.exception()) for path, f in self._futures if f.exception()]
+        self._futures = []
+        return failures
+
+
+_writer = None
+
+
+def writer(workers=2):
+    global _writer
+    if _writer is None:
+        _writer = ScreenshotWriter(workers)
+        atexit.register(_writer.close)
+    return _writer
+
+
+def flush():
+    """Finish every background write; returns [(path, error)] for failed ones."""
+    global _writer
+    if _writer is None:
+        return []
+    failures = _writer.close()
+    _writer = None
+    return failures
@@ -0,0 +1,121 @@
+"""
+In-page scrolling.
+
+One execute_async_script call scrolls the window (or a scrollable element)
+frame by frame with requestAnimationFrame, stops as soon as the target
+position is reached, waits for any lazy images that scrolled into view, and
+reports frame timings/jank back. This replaces "scroll 400px, sleep, repeat"
+loops with a single round trip that takes only as long as the page needs.
+"""
+
+import page_waits
+
+DEFAULT_STEP_PX = 120
+DEFAULT_TIMEOUT = 15
+# A frame taking longer than two 60Hz frames counts as jank
+JANK_FRAME_MS = 1000 / 60 * 2
+
+SCROLL_JS = """
+var selector = arguments[0], target = arguments[1], stepPx = arguments[2];
+var budgetMs = arguments[3], jankMs = arguments[4];
+var done = arguments[arguments.length - 1];
+var el = selector ? document.querySelector(selector) : null;
+if (selector && !el) { done({error: "No element matches " + selector}); return; }
+var scroller = el || document.scrollingElement || document.documentElement;
+var start = performance.now(), last = start, frames = [];
+
+function destination() {
+    var max = scroller.scrollHeight - scroller.clientHeight;
+    if (target === "bottom") { return max; }
+    if (target === "top") { return 0; }
+    return Math.max(0, Math.min(target, max));
+}
+
+function viewport() {
+    if (el) { return el.getBoundingClientRect(); }
+    return {top: 0, left: 0, bottom: innerHeight, right: innerWidth};
+}
+
+function pendingImages() {
+    var view = viewport(), pending = [];
+    (el || document).querySelectorAll("img").forEach(function (img) {
+        // Only images still in flight; broken or src-less ones are complete
+        // too and will never fire load/error again
+        if (img.complete) { return; }
+        var r = img.getBoundingClientRect();
+        if (r.width && r.height && r.bottom > view.top && r.top < view.bottom
+                && r.right > view.left && r.left < view.right) {
+            pending.push(img);
+        }
+    });
+    return pending;
+}
+
+function report(lazyWaited, settleMs) {
+    var sorted = frames.slice().sort(function (a, b) { return a - b; });
+    var pick = function (q) {
+        return sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))] : 0;
+    };
+    done({
+        position: scroller.scrollTop,
+        scroll_height: scroller.scrollHeight,
+        frames: frames.length,
+        scroll_ms: frames.reduce(function (a, b) { return a + b; }, 0),
+        frame_p50_ms: pick(0.5),
+        frame_p95_ms: pick(0.95),
+        frame_max_ms: sorted.length ? sorted[sorted.length - 1] : 0,
+        janky_frames: frames.filter(function (f) { return f > jankMs; }).length,
+        lazy_images: lazyWaited,
+        image_wait_ms: settleMs,
+        total_ms: performance.now() - start,
+        timed_out: performance.now() - start >= budgetMs
+    });
+}
+
+function waitForImages() {
+    var pending = pendingImages(), waitStart = performance.now();
+    if (!pending.length) { report(0, 0); return; }
+    var left = pending.length;
+    var finished = false;
+    var finish = function () {
+        if (finished) { return; }
+        finished = true;
+        report(pending.length, performance.now() - waitStart);
+    };
+    pending.forEach(function (img) {
+        var one = function () { if (--left <= 0) { finish(); } };
+        img.addEventListener("load", one, {once: true});
+        img.addEventListener("error", one, {once: true});
+    });
+    setTimeout(finish, Math.max(0, budgetMs - (performance.now() - start)));
+}
+
+function frame(now) {
+    frames.push(now - last);
+    last = now;
+    var pos = scroller.scrollTop, remaining = destination() - pos;
+    if (Math.abs(remaining) <= 1 || now - start >= budgetMs) { waitForImages(); return; }
+    scroller.scrollTop = pos + Math.sign(remaining) * Math.min(Math.abs(remaining), stepPx);
+    if (scroller.scrollTop === pos) { waitForImages(); return; }  // can't move any further
+    requestAnimationFrame(frame);
+}
+requestAnimationFrame(function (now) { last = now; requestAnimationFrame(frame); });
+"""
+
+
+def scroll(driver, target="bottom", selector=None, step_px=DEFAULT_STEP_PX,
+           timeout=DEFAULT_TIMEOUT):
+    """Scroll the window (or the element matching the CSS selector) to target:
+    "top", "bottom" or a pixel offset. Returns the in-page frame/jank report."""
+    return page_waits.run_async(
+        driver, SCROLL_JS, timeout, selector, target, step_px, timeout * 1000, JANK_FRAME_MS
+    )
+
+
+def describe(stats):
+    return (
+        f"scrolled to {stats['position']:.0f}px in {stats['frames']} frames "
+        f"({stats['total_ms']:.0f}ms, p95 frame {stats['frame_p95_ms']:.1f}ms, "
+        f"{stats['janky_frames']} janky, {stats['lazy_images']} lazy images "
+        f"waited {stats['image_wait_ms']:.0f}ms)"
+    )
@@ -0,0 +1,146 @@
+"""
+Bulk search-result extraction and sort-order verification.
+
+extract() pulls every result card on the page (ASIN, title, price, rating,
+sponsored flag) in one execute_script call. The ordering checks then run as
+NumPy array operations over one or several pages worth of prices, so real
+"is it actually sorted" verification costs a few milliseconds per page.
+classify() narrows the page_state probe down to results / no-results /
+unknown for the keyword corpus runner. The sort checks need numpy, which is
+only imported when they run, so the rest of the suite doesn't need it.
+"""
+
+import time
+from collections import namedtuple
+
+import page_state
+from deep_links import RESULT_SELECTOR
+
+EXTRACT_JS = """
+var cards = document.querySelectorAll(arguments[0]);
+var number = function (text) {
+    if (!text) { return null; }
+    var value = parseFloat(text.replace(/[^0-9.]/g, ""));
+    return isNaN(value) ? null : value;
+};
+return Array.prototype.map.call(cards, function (card, i) {
+    var title = card.querySelector("h2");
+    // The struck-through list price is .a-text-price; we want the selling price
+    var price = card.querySelector(".a-price:not(.a-text-price) .a-offscreen");
+    var rating = card.querySelector("i[class*='a-star'] .a-icon-alt, span.a-icon-alt");
+    var sponsored = card.classList.contains("AdHolder") || !!card.querySelector(
+        ".puis-sponsored-label-text, .s-sponsored-label-text, .s-label-popover-default");
+    return {
+        position: i,
+        asin: card.getAttribute("data-asin"),
+        title: title ? title.innerText.trim() : null,
+        price_text: price ? price.textContent.trim() : null,
+        price: price ? number(price.textContent) : null,
+        rating: rating ? number(rating.textContent.split(" ")[0]) : null,
+        sponsored: sponsored
+    };
+});
+"""
+
+SortCheck = namedtuple(
+    "SortCheck", "checked adjacent_inversions disorder worst_step first_bad"
+)
+
+
+def extract(driver):
+    """Every result card on the current page as a list of dicts."""
+    return driver.execute_script(EXTRACT_JS, RESULT_SELECTOR)
+
+
+def classify(driver):
+    """{"state": "results" | "no-results" | "unknown", "results": card count,
+    "page": page_state state, "reason"} for the current search page, from a
+    single page_state probe."""
+    result = page_state.probe(driver)
+    state = result["state"] if result["state"] in ("results", "no-results") else "unknown"
+    return {"state": state, "results": result["results"], "page": result["state"],
+            "reason": result["reason"]}
+
+
+def wait_for_state(driver, timeout=10, poll=0.1):
+    """classify() until the page is either results or no-results, or the
+    timeout runs out (then it's "unknown"). A captcha or error page ends the
+    wait straight away."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = classify(driver)
+        if (result["state"] != "unknown" or result["page"] in page_state.FATAL
+                or time.monotonic() > deadline):
+            return result
+        time.sleep(poll)
+
+
+def price_array(results, include_sponsored=False):
+    """Prices in page order as float64; cards without a price are NaN.
+    Sponsored cards are left out by default since they ignore the sort."""
+    import numpy as np
+
+    return np.array(
+        [np.nan if r["price"] is None else r["price"]
+         for r in results if include_sponsored or not r["sponsored"]],
+        dtype=np.float64,
+    )
+
+
+def pages_price_array(pages, include_sponsored=False):
+    """price_array() over several pages, concatenated in page order."""
+    import numpy as np
+
+    return np.concatenate(
+        [price_array(page, include_sponsored) for page in pages] or [np.empty(0)]
+    )
+
+
+def check_order(prices, descending=False):
+    """How far prices are from monotonic.
+
+    adjacent_inversions: neighbouring pairs in the wrong order
+    disorder: share of all pairs in the wrong order (0 = sorted, ~0.5 = random)
+    worst_step: biggest wrong-way jump between neighbours
+    first_bad: index (among priced items) of the first wrong-way step, or None
+    """
+    import numpy as np
+
+    p = prices[~np.isnan(prices)]
+    if descending:
+        p = -p
+    n = p.size
+    if n < 2:
+        return SortCheck(n, 0, 0.0, 0.0, None)
+    steps = np.diff(p)
+    wrong = steps < 0
+    pairs = np.triu(p[:, None] > p[None, :], k=1).sum()
+    return SortCheck(
+        checked=int(n),
+        adjacent_inversions=int(wrong.sum()),
+        disorder=float(pairs / (n * (n - 1) / 2)),
+        worst_step=float(-steps.min()) if wrong.any() else 0.0,
+        first_bad=int(np.argmax(wrong)) if wrong.any() else None,
+    )
+
+
+def duplicate_asins(pages):
+    """ASINs that show up on more than one page (pages = list of result lists)."""
+    import numpy as np
+
+    per_page = [
+        np.unique([r["asin"] for r in page if r["asin"] and not r["sponsored"]])
+        for page in pages
+    ]
+    asins = np.concatenate(per_page) if per_page else np.empty(0)
+    if asins.size == 0:
+        return []
+    values, counts = np.unique(asins, return_counts=True)
+    return values[counts > 1].tolist()
+
+
+def describe(check):
+    return (
+        f"{check.checked} prices, {check.adjacent_inversions} out-of-order neighbours, "
+        f"{check.disorder:.1%} of pairs out of order"
+    )
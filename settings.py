@@ -0,0 +1,163 @@
+"""
+Suite-wide switches.
+
+Everything is driven by environment variables so the same settings work from
+pytest, from CI and from the helper scripts without extra command-line flags.
+"""
+
+import os
+import time
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def env_str(name, default=None):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def env_flag(name, default=False):
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    value = env_str(name)
+    return default if value is None else int(value)
+
+
+def env_float(name, default):
+    value = env_str(name)
+    return default if value is None else float(value)
+
+
+# Keep one warm browser per process and wipe its state between tests
+# instead of relaunching it. Set AMZ_REUSE_BROWSER=0 for a fresh launch per test.
+REUSE_BROWSER = env_flag("AMZ_REUSE_BROWSER", True)
+
+# Set by run_parallel.py for each worker process (w0, w1, ...); empty for a
+# normal serial run.
+WORKER_ID = env_str("AMZ_WORKER_ID", "")
+
+# Identifies one run of the suite in the metrics time series; run_parallel.py
+# hands the same id to all its workers
+RUN_ID = env_str("AMZ_RUN_ID", time.strftime("%Y%m%d-%H%M%S"))
+
+# Recorded per-test durations, used to balance parallel shards
+DURATIONS_FILE = env_str(
+    "AMZ_DURATIONS_FILE", os.path.join(REPO_ROOT, ".test_durations.json")
+)
+
+# Where the storefront lives. Point this at a storefront_replay.py server
+# (e.g. http://127.0.0.1:8765/) for fast, network-free runs.
+BASE_URL = env_str("AMZ_BASE_URL", "https://www.amazon.com/")
+
+# Record every page/XHR/asset the tests touch into this archive directory
+RECORD_ARCHIVE = env_str("AMZ_RECORD_ARCHIVE")
+
+# When screenshots are kept: always | on-failure | sampled:<rate>
+SCREENSHOT_POLICY = env_str("AMZ_SCREENSHOTS", "always")
+SCREENSHOT_WORKERS = env_int("AMZ_SCREENSHOT_WORKERS", 2)
+# Store the boxes of ads/prices/... next to each frame for visual_diff.py.
+# Costs a script round trip per screenshot, so only for runs that get diffed
+SCREENSHOT_MASKS = env_flag("AMZ_SCREENSHOT_MASKS", False)
+
+# Per-step timing trace (Chrome trace-event JSON per test + slowest-steps table)
+TRACE = env_flag("AMZ_TRACE", True)
+TRACE_DIR = env_str("AMZ_TRACE_DIR", os.path.join(REPO_ROOT, "trace_output"))
+
+# Fast mode: honour the block_resources opt-ins (0 = load everything, which
+# also refreshes the per-test baseline the "saved" numbers are measured against)
+BLOCK_RESOURCES = env_flag("AMZ_BLOCK_RESOURCES", True)
+RESOURCE_BASELINE_FILE = env_str(
+    "AMZ_RESOURCE_BASELINE", os.path.join(REPO_ROOT, ".resource_baseline.json")
+)
+# Count requests/bytes per test for the fast-mode report. Turns on CDP logging
+# for every test, so it's opt-in like RECORD_ARCHIVE and HAR
+RESOURCE_REPORT = env_flag("AMZ_RESOURCE_REPORT", False)
+
+# Build every precondition through the UI (homepage -> search box -> ...)
+# even in classes that opted into deep-link setup
+UI_SETUP = env_flag("AMZ_UI_SETUP", False)
+
+# How many results pages TC11/TC12 check for real price ordering
+SORT_CHECK_PAGES = env_int("AMZ_SORT_CHECK_PAGES", 2)
+
+# How deep the pagination walker (TC22) goes
+WALK_PAGES = env_int("AMZ_WALK_PAGES", 5)
+
+# Cached hamburger-menu index, rebuilt whenever the menu content changes
+HMENU_INDEX_FILE = env_str(
+    "AMZ_HMENU_INDEX_FILE", os.path.join(REPO_ROOT, ".hmenu_index.json")
+)
+
+# Opt-in crawl of every leaf link in the hamburger menu (TC23)
+HMENU_CRAWL = env_flag("AMZ_HMENU_CRAWL", False)
+
+# Opt-in sidebar filter matrix (TC24): every combination of up to
+# AMZ_FILTER_DEPTH facets, AMZ_FILTER_VALUES values per facet, capped at
+# AMZ_FILTER_MAX_COMBOS URLs loaded AMZ_FILTER_TABS tabs at a time
+FILTER_DEPTH = env_int("AMZ_FILTER_DEPTH", 0)
+FILTER_VALUES = env_int("AMZ_FILTER_VALUES", 3)
+FILTER_MAX_COMBOS = env_int("AMZ_FILTER_MAX_COMBOS", 60)
+FILTER_TABS = env_int("AMZ_FILTER_TABS", 6)
+
+# Probe the page state after every open() and fail at once on a captcha,
+# error page or redirect instead of waiting out the next timeout
+PAGE_STATE_CHECK = env_flag("AMZ_PAGE_STATE_CHECK", True)
+
+# Dismiss "Continue shopping" and similar overlays in-page as soon as they
+# render (Chromium only). AMZ_INTERSTITIAL_GUARD=0 goes back to polling in setUp.
+INTERSTITIAL_GUARD = env_flag("AMZ_INTERSTITIAL_GUARD", True)
+
+# Web Vitals / Navigation Timing for every page visited, appended as JSONL
+VITALS = env_flag("AMZ_VITALS", True)
+VITALS_FILE = env_str("AMZ_VITALS_FILE", os.path.join(REPO_ROOT, "metrics", "vitals.jsonl"))
+VITALS_BASELINE_FILE = env_str(
+    "AMZ_VITALS_BASELINE", os.path.join(REPO_ROOT, ".vitals_baseline.json")
+)
+# Record this run's p75 LCP per page type as the new baseline instead of gating
+VITALS_UPDATE_BASELINE = env_flag("AMZ_VITALS_UPDATE_BASELINE", False)
+# The run fails when a page type's p75 LCP is more than this much over baseline
+LCP_TOLERANCE = env_float("AMZ_LCP_TOLERANCE", 0.2)
+# Page types with fewer LCP samples than this in a run are not gated
+VITALS_MIN_SAMPLES = env_int("AMZ_VITALS_MIN_SAMPLES", 3)
+
+# Write a compact HAR per test (from the CDP event log) for har_capture.py report
+HAR = env_flag("AMZ_HAR", False)
+HAR_DIR = env_str("AMZ_HAR_DIR", os.path.join(REPO_ROOT, "har_output"))
+
+# Sample browser memory (JS heap, DOM nodes, listeners, renderer RSS) after
+# every test, and every N steps in the heavy flows, into one JSONL per session
+MEMORY_PROFILE = env_flag("AMZ_MEMORY_PROFILE", False)
+MEMORY_DIR = env_str("AMZ_MEMORY_DIR", os.path.join(REPO_ROOT, "metrics", "memory"))
+# A session is flagged when the last MEMORY_WINDOW per-test samples only go up
+# and grow by more than these amounts in total
+MEMORY_WINDOW = env_int("AMZ_MEMORY_WINDOW", 5)
+MEMORY_GROWTH_MB = env_float("AMZ_MEMORY_GROWTH_MB", 50)
+MEMORY_NODES_GROWTH = env_int("AMZ_MEMORY_NODES_GROWTH", 5000)
+# Write a heap snapshot when a session gets flagged
+MEMORY_HEAP_SNAPSHOT = env_flag("AMZ_MEMORY_HEAP_SNAPSHOT", False)
+
+# Time every selector in the page and suggest faster scoped alternatives
+LOCATOR_AUDIT = env_flag("AMZ_LOCATOR_AUDIT", False)
+# Selectors resolving slower than this (mean, in the page) get flagged
+SLOW_LOCATOR_MS = env_float("AMZ_SLOW_LOCATOR_MS", 1.0)
+
+# Run history: tests, waits and page loads of every run in one SQLite file
+RUN_HISTORY = env_flag("AMZ_RUN_HISTORY", True)
+RUN_HISTORY_DB = env_str(
+    "AMZ_RUN_HISTORY_DB", os.path.join(REPO_ROOT, "metrics", "run_history.sqlite")
+)
+
+# Adaptive wait timeouts: p99 of the selector's past waits in the same test
+# class x margin, between the floor and the hard-coded timeout
+ADAPTIVE_TIMEOUTS = env_flag("AMZ_ADAPTIVE_TIMEOUTS", False)
+ADAPTIVE_MARGIN = env_float("AMZ_ADAPTIVE_MARGIN", 3.0)
+ADAPTIVE_FLOOR = env_float("AMZ_ADAPTIVE_FLOOR", 2.0)
+ADAPTIVE_MIN_SAMPLES = env_int("AMZ_ADAPTIVE_MIN_SAMPLES", 20)
+ADAPTIVE_DAYS = env_int("AMZ_ADAPTIVE_DAYS", 30)
@@ -0,0 +1,203 @@
+"""
+Per-step timing trace.
+
+Every traced BaseCase step (open, click, type, wait_for_*, ...) and every raw
+WebDriver command underneath it is timestamped while a test runs. At the end
+of the test the spans are written as a Chrome trace-event file, which opens
+in chrome://tracing or https://ui.perfetto.dev, and folded into a suite-wide
+"slowest steps" table printed at the end of the run.
+
+Recording a span is just two perf_counter_ns() calls and a list append, so the
+tracer is cheap enough to leave on in CI (AMZ_TRACE=0 turns it off).
+"""
+
+import functools
+import json
+import os
+import re
+import time
+from collections import defaultdict
+
+# BaseCase methods that show up as steps in the trace
+TRACED_STEPS = (
+    "open", "click", "js_click", "click_if_visible", "type", "send_keys",
+    "hover_on_element", "scroll_to_element", "scroll_in_page", "execute_script",
+    "find_elements",
+    "get_attribute", "get_text", "is_element_visible", "is_element_present",
+    "is_element_enabled", "is_text_visible", "save_screenshot",
+    "wait_for_element_visible", "wait_for_element_present",
+    "wait_for_element_clickable", "wait_for_element_not_visible", "wait_for_text",
+    "wait_for_page_settled", "wait_for_element_stable", "probe_dom",
+    "open_search_results", "extract_search_results", "expect_page",
+    "verify_sort_order",
+    "walk_pagination", "run_filter_matrix", "menu_index", "open_hmenu_path",
+    "dismiss_interstitials",
+    "assert_element", "assert_element_visible", "assert_element_not_visible",
+    "assert_text", "assert_text_visible",
+)
+
+_current = None
+
+# (step, target) -> [count, total_ns, max_ns]; top-level steps only so nested
+# calls are not counted twice
+suite_steps = defaultdict(lambda: [0, 0, 0])
+# test id -> {category: total_ns}
+suite_tests = {}
+
+# Called as listener(tracer, step_name) after every finished top-level step
+step_listeners = []
+
+
+def category(name):
+    return "wait" if name.startswith(("wait_", "assert_")) else "step"
+
+
+class StepTracer:
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.origin = time.perf_counter_ns()
+        self.spans = []
+        self.depth = 0
+        self.step_count = 0
+        # Indexes into spans of the steps that raised (timed-out waits, ...)
+        self.failed = set()
+
+    def span(self, name, cat, target=None):
+        return _Span(self, name, cat, target)
+
+    def _record(self, name, cat, target, start, end, depth):
+        self.spans.append((name, cat, target, start, end, depth))
+        if depth == 0 and cat != "webdriver":
+            self.step_count += 1
+            stats = suite_steps[(name, target)]
+            stats[0] += 1
+            stats[1] += end - start
+            stats[2] = max(stats[2], end - start)
+            for listener in step_listeners:
+                listener(self, name)
+
+    def totals(self):
+        """Time per category, counting only top-level spans."""
+        totals = defaultdict(int)
+        for name, cat, target, start, end, depth in self.spans:
+            if depth == 0:
+                totals[cat] += end - start
+        return dict(totals)
+
+    def trace_events(self):
+        pid = os.getpid()
+        events = [{
+            "name": "thread_name", "ph": "M", "pid": pid, "tid": 1,
+            "args": {"name": self.test_id},
+        }]
+        for name, cat, target, start, end, depth in self.spans:
+            event = {
+                "name": name, "cat": cat, "ph": "X", "pid": pid, "tid": 1,
+                "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000,
+            }
+            if target is not None:
+                event["args"] = {"target": target}
+            events.append(event)
+        return events
+
+    def write(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        file_name = re.sub(r"[^\w.-]+", "_", self.test_id) + ".json"
+        path = os.path.join(folder, file_name)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "target", "start", "depth")
+
+    def __init__(self, tracer, name, cat, target):
+        self.tracer, self.name, self.cat, self.target = tracer, name, cat, target
+
+    def __enter__(self):
+        self.depth = self.tracer.depth
+        self.tracer.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.depth -= 1
+        self.tracer._record(
+            self.name, self.cat, self.target, self.start, end, self.depth
+        )
+        if exc[0] is not None:
+            self.tracer.failed.add(len(self.tracer.spans) - 1)
+        return False
+
+
+def start(test_id):
+    global _current
+    _current = StepTracer(test_id)
+    return _current
+
+
+def finish(folder=None):
+    """Close out the current test; write its trace file if a folder is given."""
+    global _current
+    tracer, _current = _current, None
+    if tracer is None:
+        return None
+    suite_tests[tracer.test_id] = tracer.totals()
+    if folder:
+        tracer.write(folder)
+    return tracer
+
+
+def traced(name, method):
+    """Wrap a BaseCase method so each call becomes a span in the current trace."""
+    cat = category(name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tracer = _current
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        target = args[0] if args and isinstance(args[0], str) else None
+        with tracer.span(name, cat, target):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def hook_driver(driver):
+    """Time every raw WebDriver command sent through this driver (once per driver)."""
+    if getattr(driver, "_step_trace_hooked", False):
+        return
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        tracer = _current
+        if tracer is None:
+            return execute(driver_command, params)
+        with tracer.span(driver_command, "webdriver"):
+            return execute(driver_command, params)
+
+    driver.execute = traced_execute
+    driver._step_trace_hooked = True
+
+
+def summary_lines(limit=15):
+    """Suite-wide table of the slowest steps, by total time spent in them."""
+    if not suite_steps:
+        return []
+    rows = sorted(suite_steps.items(), key=lambda item: item[1][1], reverse=True)
+    lines = [
+        "Slowest steps across the suite:",
+        f"  {'total s':>8} {'calls':>6} {'mean s':>7} {'max s':>7}  step",
+    ]
+    for (name, target), (count, total, worst) in rows[:limit]:
+        label = f"{name}({target!r})" if target is not None else name
+        if len(label) > 90:
+            label = label[:87] + "..."
+        lines.append(
+            f"  {total / 1e9:8.2f} {count:6d} {total / count / 1e9:7.2f} "
+            f"{worst / 1e9:7.2f}  {label}"
+        )
+    return lines
@@ -0,0 +1,262 @@
+"""
+Offline stand-in for amazon.com: record the pages our flows touch, then serve
+them back from a local HTTP server.
+
+Record (live site, any tests you like):
+    AMZ_RECORD_ARCHIVE=storefront_archive pytest test_search_product.py
+
+Replay:
+    python storefront_replay.py serve --archive storefront_archive --port 8765
+    AMZ_BASE_URL=http://127.0.0.1:8765/ pytest
+
+While recording, documents, XHR/fetch responses and assets are pulled out of
+the browser through CDP and stored in a content-addressed archive
+(index.json + bodies/). Absolute links to www.amazon.com become relative and
+links to the other Amazon hosts (images, scripts) are rewritten to
+/_h/<host>/..., so the replayed pages only ever talk to the replay server.
+"""
+
+import argparse
+import base64
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+# Query parameters that change on every visit and don't affect the page
+VOLATILE_PARAMS = {
+    "ref", "ref_", "qid", "crid", "sprefix", "sr", "dib", "dib_tag",
+    "content-id", "_encoding", "th", "psc", "spLa", "sp_csd",
+}
+VOLATILE_PREFIXES = ("pd_rd_", "pf_rd_")
+
+KEPT_HEADERS = ("content-type", "cache-control", "location")
+TEXT_TYPES = ("html", "javascript", "css", "json", "text/plain", "xml")
+RECORDED_TYPES = {
+    "Document", "XHR", "Fetch", "Script", "Stylesheet", "Image", "Font", "Media",
+}
+
+_AMAZON_URL = re.compile(
+    r"(?:https?:)?(//|\\/\\/)"
+    r"((?:[a-z0-9-]+\.)*(?:amazon|media-amazon|ssl-images-amazon|images-amazon"
+    r"|amazon-adsystem)\.com)"
+    r"(/|\\/)",
+    re.IGNORECASE,
+)
+
+
+def archive_key(url, main_host):
+    """Path (+ query) the replay server will see for this URL."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    host = (parts.hostname or "").lower()
+    if host != main_host:
+        path = f"/_h/{host}{path}"
+    return path + (f"?{parts.query}" if parts.query else "")
+
+
+def normalize_key(key):
+    """Drop tracking bits so a replayed click still finds the recorded page."""
+    path, _, query = key.partition("?")
+    path = re.sub(r"/ref=[^/]*", "", path)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+        if k not in VOLATILE_PARAMS and not k.startswith(VOLATILE_PREFIXES)
+    )
+    return path + (f"?{urlencode(params)}" if params else "")
+
+
+def rewrite_links(text, main_host):
+    def replace(match):
+        slash, host = match.group(3), match.group(2).lower()
+        if host == main_host:
+            return slash
+        return f"{slash}_h{slash}{host}{slash}"
+
+    return _AMAZON_URL.sub(replace, text)
+
+
+class Archive:
+    """index.json maps request keys to {status, headers, body}; bodies are
+    stored once under bodies/ by their SHA-1."""
+
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.main_host = data.get("main_host")
+        self.entries = data.get("entries", {})
+        self.normalized = {normalize_key(key): key for key in self.entries}
+
+    def body_path(self, digest):
+        return os.path.join(self.root, "bodies", digest[:2], digest)
+
+    def add(self, key, status, headers, body):
+        digest = None
+        if body is not None:
+            digest = hashlib.sha1(body).hexdigest()
+            path = self.body_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(body)
+        with self._lock:
+            self.entries[key] = {"status": status, "headers": headers, "body": digest}
+            self.normalized[normalize_key(key)] = key
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries.get(self.normalized.get(normalize_key(key)))
+        return entry
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with self._lock, open(tmp, "w") as f:
+            json.dump({"main_host": self.main_host, "entries": self.entries}, f)
+        os.replace(tmp, self.index_path)
+
+
+class Recorder:
+    """Subscribes to a CdpEventPump and copies finished responses into an Archive."""
+
+    def __init__(self, driver, archive, main_host):
+        self.driver = driver
+        self.archive = archive
+        self.archive.main_host = main_host
+        self.main_host = main_host
+        self._responses = {}
+        try:
+            # Keep bodies around after navigation until we've had a chance to read them
+            driver.execute_cdp_cmd("Network.enable", {
+                "maxTotalBufferSize": 200 * 1024 * 1024,
+                "maxResourceBufferSize": 20 * 1024 * 1024,
+            })
+        except WebDriverException:
+            pass
+
+    def __call__(self, method, params):
+        if method == "Network.requestWillBeSent" and params.get("redirectResponse"):
+            self._store(params["redirectResponse"], None)
+        elif method == "Network.responseReceived":
+            if params.get("type") in RECORDED_TYPES:
+                self._responses[params["requestId"]] = params["response"]
+        elif method == "Network.loadingFinished":
+            response = self._responses.pop(params["requestId"], None)
+            if response is not None:
+                self._store(response, self._body(params["requestId"]))
+        elif method == "Network.loadingFailed":
+            self._responses.pop(params["requestId"], None)
+
+    def _body(self, request_id):
+        try:
+            result = self.driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": request_id}
+            )
+        except WebDriverException:
+            return None
+        if result.get("base64Encoded"):
+            return base64.b64decode(result["body"])
+        return result["body"].encode("utf-8")
+
+    def _store(self, response, body):
+        url = response.get("url", "")
+        if not url.startswith("http"):
+            return
+        headers = {k.lower(): v for k, v in response.get("headers", {}).items()}
+        kept = {k: headers[k] for k in KEPT_HEADERS if k in headers}
+        if "location" in kept:
+            kept["location"] = rewrite_links(kept["location"], self.main_host)
+        mime = response.get("mimeType", "")
+        if body is not None and any(t in mime for t in TEXT_TYPES):
+            text = body.decode("utf-8", errors="replace")
+            body = rewrite_links(text, self.main_host).encode("utf-8")
+        self.archive.add(
+            archive_key(url, self.main_host), response.get("status", 200), kept, body
+        )
+
+    def flush(self):
+        self.archive.save()
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the browser keeps its connections alive between requests
+    protocol_version = "HTTP/1.1"
+    archive = None
+
+    def do_GET(self):
+        entry = self.archive.lookup(self.path)
+        if entry is None:
+            self._send(404, {"content-type": "text/plain"},
+                       f"Not in archive: {self.path}".encode("utf-8"))
+            return
+        body = _read_body(self.archive.root, entry["body"]) if entry["body"] else b""
+        self._send(entry["status"], entry["headers"], body)
+
+    def do_POST(self):
+        # Beacons, metrics and the like; nothing we need to answer
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self._send(204, {}, b"")
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@functools.lru_cache(maxsize=4096)
+def _read_body(root, digest):
+    with open(os.path.join(root, "bodies", digest[:2], digest), "rb") as f:
+        return f.read()
+
+
+def serve(archive_dir, host="127.0.0.1", port=8765):
+    archive = Archive(archive_dir)
+    if not archive.entries:
+        sys.exit(f"No recordings found in {archive_dir}")
+    handler = type("Handler", (ReplayHandler,), {"archive": archive})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"Replaying {len(archive.entries)} recorded responses "
+          f"from {archive_dir} on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline storefront replay server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="serve a recorded archive")
+    serve_cmd.add_argument("--archive", default="storefront_archive")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    serve(args.archive, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Search-suggestion latency benchmark.
+
+Streams prefixes from a text file (one per line) through a single warm
+browser. Each prefix is typed one key at a time, and an in-page listener
+measures each keystroke: a performance mark at keydown, and a measure ending
+at the first mutation of .left-pane-results-container after it. Latencies are
+grouped by prefix length. Each length gets p50/p95/p99 and a histogram, and
+the results go to a JSON file. Running compare on two result files shows the
+regressions.
+
+Usage:
+    python suggest_bench.py run prefixes.txt --out suggest_latency.json --headless
+    python suggest_bench.py compare baseline.json suggest_latency.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import interstitial_guard
+import settings
+
+SEARCH_BAR = 'input[name="field-keywords"]'
+SUGGESTION_PANE = ".left-pane-results-container"
+# Histogram bucket upper edges in ms; the last bucket is everything slower
+BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600)
+
+INSTRUMENT_JS = """
+if (window.__amzSuggest) { return; }
+var state = window.__amzSuggest = {seq: 0, pending: null, samples: {}};
+var input = document.querySelector(arguments[0]), paneSelector = arguments[1];
+input.addEventListener("keydown", function () {
+    state.seq += 1;
+    state.pending = state.seq;
+    performance.mark("amz-kd-" + state.seq);
+}, true);
+new MutationObserver(function (mutations) {
+    if (state.pending === null) { return; }
+    var hit = mutations.some(function (m) {
+        var node = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+        if (node && node.closest(paneSelector)) { return true; }
+        // The pane itself being inserted (first suggestions for this page)
+        return Array.prototype.some.call(m.addedNodes, function (added) {
+            return added.nodeType === 1 && (added.matches(paneSelector)
+                                            || !!added.querySelector(paneSelector));
+        });
+    });
+    if (!hit) { return; }
+    var seq = state.pending;
+    state.pending = null;
+    var measure = performance.measure("amz-suggest-" + seq, "amz-kd-" + seq);
+    state.samples[seq] = measure.duration;
+    performance.clearMarks("amz-kd-" + seq);
+    performance.clearMeasures("amz-suggest-" + seq);
+}).observe(document.body, {childList: true, subtree: true, characterData: true});
+"""
+
+# Resolves with the latency of the latest keystroke, or null on timeout
+WAIT_JS = """
+var timeoutMs = arguments[0], done = arguments[arguments.length - 1];
+var start = performance.now(), state = window.__amzSuggest;
+if (!state) { done({lost: true}); return; }
+var seq = state.seq;
+(function check() {
+    if (seq in state.samples) {
+        var ms = state.samples[seq];
+        delete state.samples[seq];
+        done({ms: ms});
+    } else if (performance.now() - start > timeoutMs) {
+        if (state.pending === seq) { state.pending = null; }
+        done({ms: null});
+    } else {
+        setTimeout(check, 5);
+    }
+})();
+"""
+
+CLEAR_JS = """
+var input = document.querySelector(arguments[0]);
+input.value = "";
+input.dispatchEvent(new Event("input", {bubbles: true}));
+return !!window.__amzSuggest;
+"""
+
+
+def read_prefixes(path, limit=None):
+    """Yield prefixes from the file lazily, skipping blanks and # comments."""
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            prefix = line.strip()
+            if not prefix or prefix.startswith("#"):
+                continue
+            yield prefix
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for v in values:
+        for i, edge in enumerate(BUCKETS_MS):
+            if v <= edge:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={edge}" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def summarize(samples, timeouts):
+    """samples/timeouts: {prefix length: [...]/count} -> result dict per length."""
+    by_length = {}
+    for length in sorted(set(samples) | set(timeouts)):
+        values = sorted(samples.get(length, []))
+        by_length[str(length)] = {
+            "n": len(values),
+            "timeouts": timeouts.get(length, 0),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "histogram": histogram(values),
+        }
+    return by_length
+
+
+class Bench:
+    def __init__(self, driver, base_url, timeout_ms):
+        self.driver = driver
+        self.base_url = base_url
+        self.timeout_ms = timeout_ms
+        self.samples = {}
+        self.timeouts = {}
+        self.prefixes = 0
+
+    def load(self):
+        self.driver.get(self.base_url)
+        deadline = time.monotonic() + 30
+        while not self.driver.find_elements("css selector", SEARCH_BAR):
+            if time.monotonic() > deadline:
+                raise RuntimeError("Search bar never showed up")
+            time.sleep(0.1)
+        self.driver.execute_script(INSTRUMENT_JS, SEARCH_BAR, SUGGESTION_PANE)
+        self.input = self.driver.find_element("css selector", SEARCH_BAR)
+
+    def run_prefix(self, prefix):
+        if not self.driver.execute_script(CLEAR_JS, SEARCH_BAR):
+            self.load()
+        for length, key in enumerate(prefix, start=1):
+            self.input.send_keys(key)
+            result = self.driver.execute_async_script(WAIT_JS, self.timeout_ms)
+            if result.get("lost"):
+                # The page navigated away; start over on a fresh one
+                self.load()
+                return
+            if result["ms"] is None:
+                self.timeouts[length] = self.timeouts.get(length, 0) + 1
+            else:
+                self.samples.setdefault(length, []).append(result["ms"])
+        self.prefixes += 1
+
+    def results(self):
+        return {
+            "meta": {
+                "base_url": self.base_url,
+                "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "prefixes": self.prefixes,
+                "keystrokes": sum(map(len, self.samples.values()))
+                + sum(self.timeouts.values()),
+                "timeout_ms": self.timeout_ms,
+            },
+            "by_length": summarize(self.samples, self.timeouts),
+        }
+
+
+def run(args):
+    from seleniumbase import SB
+
+    with SB(browser="chrome", headless=args.headless) as sb:
+        sb.driver.set_script_timeout(args.timeout_ms / 1000 + 10)
+        interstitial_guard.install(sb.driver)
+        bench = Bench(sb.driver, args.base_url, args.timeout_ms)
+        bench.load()
+        for prefix in read_prefixes(args.prefixes, args.limit):
+            bench.run_prefix(prefix)
+            if bench.prefixes and bench.prefixes % 100 == 0:
+                print(f"{bench.prefixes} prefixes done")
+        results = bench.results()
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print(f"Saved to {args.out}")
+
+
+def print_results(results):
+    print(f"{'len':>4} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'timeouts':>9}")
+    for length, row in results["by_length"].items():
+        cells = [f"{row[k]:8.0f}" if row[k] is not None else f"{'-':>8}"
+                 for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{length:>4} {row['n']:>7} {' '.join(cells)} {row['timeouts']:>9}")
+
+
+def compare(args):
+    """Print p50/p95/p99 per prefix length side by side; exit 1 if any p95
+    got more than --threshold (relative) slower."""
+    with open(args.baseline) as f:
+        old = json.load(f)["by_length"]
+    with open(args.current) as f:
+        new = json.load(f)["by_length"]
+    regressions = []
+    print(f"{'len':>4} {'p50':>15} {'p95':>15} {'p99':>15}")
+    for length in sorted(set(old) & set(new), key=int):
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            a, b = old[length][key], new[length][key]
+            if a is None or b is None:
+                cells.append(f"{'-':>15}")
+                continue
+            cells.append(f"{a:6.0f} -> {b:5.0f}")
+            if key == "p95_ms" and a > 0 and (b - a) / a > args.threshold:
+                regressions.append(f"length {length}: p95 {a:.0f}ms -> {b:.0f}ms")
+        print(f"{length:>4} {' '.join(cells)}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search-suggestion latency benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="type every prefix and record latencies")
+    run_cmd.add_argument("prefixes", help="text file, one prefix per line")
+    run_cmd.add_argument("--out", default="suggest_latency.json")
+    run_cmd.add_argument("--limit", type=int, default=None)
+    run_cmd.add_argument("--timeout-ms", type=int, default=3000,
+                         help="give up on a keystroke after this long")
+    run_cmd.add_argument("--base-url", default=settings.BASE_URL)
+    run_cmd.add_argument("--headless", action="store_true")
+
+    compare_cmd = sub.add_parser("compare", help="compare two result files")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--threshold", type=float, default=0.2,
+                             help="allowed relative p95 slowdown (default 0.2)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
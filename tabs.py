@@ -0,0 +1,91 @@
+"""
+Load several pages at once in background tabs.
+
+WebDriver only talks to one tab at a time, but the browser loads every tab in
+parallel. load_in_tabs() starts all navigations up front with window.open(),
+then visits each tab just long enough to wait for it, read what it needs and
+close it. The whole batch takes about as long as the slowest page instead of
+the sum of all of them.
+
+Note that CDP settings such as fast-mode URL blocking are per tab, so the
+extra tabs load with all resources.
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Navigation Timing for the tab's current document, in ms from navigation start
+TIMING_JS = """
+var nav = performance.getEntriesByType("navigation")[0];
+if (!nav) { return null; }
+return {
+    ttfb_ms: nav.responseStart,
+    dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+    load_ms: nav.loadEventEnd || null,
+    transfer_bytes: nav.transferSize,
+    status: nav.responseStatus || null
+};
+"""
+
+READY_JS = """
+return document.readyState !== "loading" && !!document.querySelector(arguments[0]);
+"""
+
+
+def open_tabs(driver, urls):
+    """Start loading every URL in its own tab; returns the tab handles in order."""
+    handles = []
+    known = set(driver.window_handles)
+    for url in urls:
+        driver.execute_script("window.open(arguments[0], '_blank');", url)
+        new = [h for h in driver.window_handles if h not in known]
+        if not new:
+            raise WebDriverException(f"Could not open a tab for {url} (popup blocked?)")
+        handles.append(new[0])
+        known.add(new[0])
+    return handles
+
+
+def wait_until_ready(driver, ready_selector, deadline, poll=0.1):
+    while not driver.execute_script(READY_JS, ready_selector):
+        if time.monotonic() >= deadline:
+            raise TimeoutException(f"'{ready_selector}' never showed up")
+        time.sleep(poll)
+
+
+def load_in_tabs(driver, urls, ready_selector, collect, timeout=20):
+    """Open all urls in parallel tabs and return one dict per url (in order):
+
+        {"url", "data": collect(driver) or None, "timing": Navigation Timing,
+         "error": message or None}
+
+    The driver is switched back to the original tab afterwards."""
+    home = driver.current_window_handle
+    existing = set(driver.window_handles)
+    deadline = time.monotonic() + timeout
+    pages = []
+    try:
+        handles = open_tabs(driver, urls)
+        for url, handle in zip(urls, handles):
+            page = {"url": url, "data": None, "timing": None, "error": None}
+            try:
+                driver.switch_to.window(handle)
+                wait_until_ready(driver, ready_selector, deadline)
+                page["data"] = collect(driver)
+                page["timing"] = driver.execute_script(TIMING_JS)
+            except WebDriverException as e:
+                page["error"] = e.msg or type(e).__name__
+            pages.append(page)
+    finally:
+        for handle in driver.window_handles:
+            if handle not in existing:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(home)
+    return pages
+
+
+def current_timing(driver):
+    """Navigation Timing for the page in the current tab."""
+    return driver.execute_script(TIMING_JS)
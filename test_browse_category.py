@@ -1,33 +1,41 @@
-from seleniumbase import BaseCase
+import unittest
 
-class TestBrowseCategory(BaseCase):
+import hmenu_index
+import scroll_driver
+import settings
+from amazon_base import AmazonBaseCase
+
+class TestBrowseCategory(AmazonBaseCase):
     """
     Tests for category navigation and side-menu behavior.
     Checks if we can scroll the menu properly, navigate deep into sub-categories,
     and return to the starting point without the UI breaking.
     """
     
+    # Page content matters here, so only ads and analytics beacons are blocked
+    block_resources = ("ads", "analytics")
+
+    # The menu tree is the heaviest DOM we touch; sample memory as we walk it
+    memory_sample_every = 5
+
     def setUp(self):
         super().setUp()
         print("\n---- RUNNING BEFORE THE TEST ----")
-        self.open("https://www.amazon.com/") 
+        self.open(self.base_url) 
         self.maximize_window()
         
         # Standard check to make sure the page actually loaded
         self.wait_for_element_present("body")
         
         # Close the "Continue shopping" pop-up if it appears so it doesn't block clicks
-        self.click_if_visible('button[alt="Continue shopping"]') 
+        self.dismiss_interstitials()
         
         # Hamburger menu is our main anchor, need to make sure it's ready
         self.wait_for_element_visible("#nav-hamburger-menu", timeout=15)
-        self.sleep(5)
+        self.wait_for_page_settled()
 
     def tearDown(self):         
-        # Clean out everything so the next test starts with a fresh session
-        self.clear_local_storage()
-        self.clear_session_storage()
-        self.delete_all_cookies()
+        # AmazonBaseCase wipes cookies/storage so the next test starts with a fresh session
         super().tearDown()
         print("---- END OF TEST ----")
 
@@ -41,25 +49,22 @@ class TestBrowseCategory(BaseCase):
         menu_selector = 'div.hmenu-visible[data-menu-id="1"]'
         self.wait_for_element_visible(menu_selector, timeout=10)
         
-        # Need to know how far we can actually scroll
-        total_height = self.execute_script(f"return document.querySelector('{menu_selector}').scrollHeight")
+        # Scroll all the way down inside the page; it stops as soon as it hits the bottom
+        down = self.scroll_in_page("bottom", selector=menu_selector)
 
-        if not total_height:
+        if not down["scroll_height"]:
             self.fail("Could not calculate the scroll height of the menu.")
 
-        print(f"Menu scroll height: {total_height}px")
-
-        # Scroll down in chunks so we can see the movement in the logs/screenshots
-        for pos in range(0, total_height, 400):
-            self.execute_script(f"document.querySelector('{menu_selector}').scrollTop = {pos}")
-            self.sleep(0.2)
+        print(f"Menu scroll height: {down['scroll_height']}px")
+        print(f"Down: {scroll_driver.describe(down)}")
         
         self.save_screenshot("TC05_scrolled_down.png", "Test Case Screenshots")
 
         # Now scroll back up to the top to make sure it doesn't get stuck
-        for pos in range(total_height, -400, -400):
-            self.execute_script(f"document.querySelector('{menu_selector}').scrollTop = {pos}")
-            self.sleep(0.2)
+        up = self.scroll_in_page("top", selector=menu_selector)
+        print(f"Up: {scroll_driver.describe(up)}")
+        if up["position"] > 0:
+            self.fail("Menu got stuck and did not scroll back to the top.")
 
         self.save_screenshot("TC05_scrolled_up.png", "Test Case Screenshots")
 
@@ -75,15 +80,9 @@ class TestBrowseCategory(BaseCase):
         # Wait for the DOM to update with the menu content
         self.wait_for_element_present("#hmenu-content", timeout=10)
         
-        # Find and click 'Electronics'
-        electronics_link = "a:contains('Electronics')"
-        self.wait_for_element_visible(electronics_link, timeout=10)
-        self.js_click(electronics_link)
-
-        # Move deeper into 'Wearable Technology'
-        wearable_link = "a:contains('Wearable Technology')"
-        self.wait_for_element_visible(wearable_link, timeout=10)
-        self.js_click(wearable_link)
+        # Look up Electronics > Wearable Technology in the cached menu index and
+        # jump straight into the Electronics sub-menu to click it
+        self.open_hmenu_path("Electronics", "Wearable Technology")
 
         # Confirm the page actually loaded the right content
         self.wait_for_element_present("#search, .s-main-slot", timeout=15)
@@ -151,7 +150,8 @@ class TestBrowseCategory(BaseCase):
         back_btn = 'a[aria-label="Back to main menu"]'
         self.wait_for_element_visible(back_btn, timeout=10)
         self.js_click(back_btn)
-        self.sleep(5)
+        # Wait for the slide-back animation to finish instead of a fixed pause
+        self.wait_for_page_settled()
         
         # Reset scroll position via JS just in case the menu gets stuck in a blank spot
         self.execute_script("""
@@ -162,4 +162,20 @@ class TestBrowseCategory(BaseCase):
         # Confirm we are back where we started
         self.wait_for_element_visible('#hmenu-content', timeout=10)
         self.assert_text_visible("shop by department", timeout=10)
-        self.save_screenshot("TC08_Returned_To_Main_Menu.png", "Test Case Screenshots")
\ No newline at end of file
+        self.save_screenshot("TC08_Returned_To_Main_Menu.png", "Test Case Screenshots")
+
+    @unittest.skipUnless(settings.HMENU_CRAWL, "set AMZ_HMENU_CRAWL=1 to crawl every menu link")
+    def test_case_TC23(self):
+        """Open every leaf link in the hamburger menu and make sure none of them is broken."""
+        self.js_click('a[aria-label="Open All Categories Menu"]')
+        self.wait_for_element_present("#hmenu-content", timeout=10)
+
+        # The index already knows every link, so they're opened in batches of
+        # background tabs instead of clicking through the menu one by one
+        index = self.menu_index()
+        broken, checked = hmenu_index.crawl(self.driver, index, self.base_url)
+        print(f"Checked {checked} menu links, {len(broken)} broken.")
+        for link in broken:
+            print(f"  {link['label']}: {link['url']} ({link['status'] or link['error']})")
+        if broken:
+            self.fail(f"{len(broken)} of {checked} menu links are broken")
@@ -1,27 +1,26 @@
-from seleniumbase import BaseCase
+from amazon_base import AmazonBaseCase
 
-class TestNavigationUI(BaseCase):
+class TestNavigationUI(AmazonBaseCase):
     
+    # None of these assertions look at images, so skip them (plus ads/beacons)
+    block_resources = ("images", "ads", "analytics")
+
     def setUp(self):
         super().setUp()
         print("\n---- RUNNING BEFORE THE TEST ----")
-        self.open("https://www.amazon.com/") 
+        self.open(self.base_url) 
         self.maximize_window()
         
         # Professor's Style: Wait for page stability
         self.wait_for_element_present("body")
         
         # Handle the common interruption immediately
-        if self.is_element_visible('button[alt="Continue shopping"]'):
-            self.click('button[alt="Continue shopping"]')
+        self.dismiss_interstitials()
         
         # Ensure the header is interactive before starting any TC
         self.wait_for_element_visible("#nav-logo-sprites", timeout=15)
 
     def tearDown(self):        
-        self.clear_local_storage()
-        self.clear_session_storage()
-        self.delete_all_cookies()
         super().tearDown()
         print("---- END OF TEST ----")
 
@@ -30,7 +29,7 @@ class TestNavigationUI(BaseCase):
         # Navigation away
         self.type('input[name="field-keywords"]', "laptop\n") 
         self.wait_for_element_visible('div[data-component-type="s-search-result"]', timeout=15)
-        self.sleep(5)
+        self.wait_for_page_settled()
 
         # Professor's Verification Strategy
         logo_selector = "#nav-logo-sprites"
@@ -89,12 +88,16 @@ class TestNavigationUI(BaseCase):
         # 2. Execution: Verify visibility before interaction (Professor's pattern)
         if self.is_element_visible(cart_icon):
             print("Cart icon is visible on the header")
+            homepage = self.page_document()
             self.js_click(cart_icon) # Using robust click to avoid potential overlays
         else:
             self.fail("Cart icon should be visible but it is hidden")
 
-        # 3. Verification: Wait for Cart-specific container first
-        # This prevents logic from proceeding before the page has rendered
+        # 3. Verification: Make sure the click landed on the cart at all;
+        # a captcha or error page fails here straight away with the reason
+        self.expect_page("cart", since=homepage)
+
+        # Then wait for the Cart-specific container to render
         cart_container = "#sc-active-cart, .sc-your-amazon-cart-is-empty"
         self.wait_for_element_visible(cart_container, timeout=15)
 
@@ -167,7 +170,7 @@ class TestNavigationUI(BaseCase):
         expand_button = 'button[aria-label*="Expand to Change Language or Country"]'
 
         self.wait_for_element_visible(expand_button, timeout=15)
-        self.sleep(5)
+        self.wait_for_element_stable(expand_button)
         initial_state = self.get_attribute(expand_button, "aria-expanded")
         if initial_state == "false":
             print("Confirmed: Button is initially collapsed (aria-expanded='false')")
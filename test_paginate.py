@@ -1,42 +1,48 @@
-from seleniumbase import BaseCase
+from amazon_base import AmazonBaseCase
 
-class TestPaginate(BaseCase):
+class TestPaginate(AmazonBaseCase):
     """
     Tests for pagination behavior.
     Checks if we can hop between pages using direct numbers and 
     the 'Next'/'Previous' arrow buttons.
     """
 
+    # None of these assertions look at images, so skip them (plus ads/beacons)
+    block_resources = ("images", "ads", "analytics")
+
+    # Pagination is under test, not the search box, so start from the results URL
+    deep_link_setup = True
+
     def setUp(self):
         super().setUp()
         print("\n---- RUNNING BEFORE THE TEST ----")
-        self.open("https://www.amazon.com/") 
         self.maximize_window()
+
+        # With deep links perform_search() jumps straight to the results page,
+        # so there's no need to load the homepage first
+        if self.uses_deep_links():
+            return
+        self.open(self.base_url) 
         
         # Standard check to make sure the site isn't hanging on a blank screen
         self.wait_for_element_present("body")
         
         # Clear the "Continue shopping" overlay if it's blocking the search bar
-        if self.is_element_visible('button[alt="Continue shopping"]'):
-            self.click('button[alt="Continue shopping"]')
+        self.dismiss_interstitials()
         
         # Don't proceed until the search bar is ready for input
         self.wait_for_element_visible('input[name="field-keywords"]', timeout=15)
 
     def tearDown(self):         
-        # Cleanup cookies so each test starts with a fresh session
-        self.clear_local_storage()
-        self.clear_session_storage()
-        self.delete_all_cookies()
+        # Cookies get wiped by AmazonBaseCase so each test starts with a fresh session
         super().tearDown()
         print("---- END OF TEST ----")
 
     def perform_search(self, keyword="Bag"):
         """Search helper to keep the test cases focused on pagination rather than typing"""
-        search_bar = 'input[name="field-keywords"]'
-        self.type(search_bar, f"{keyword}\n")
-        # Need to see at least one product before we try to scroll to the bottom
-        self.wait_for_element_visible('div[data-component-type="s-search-result"]', timeout=15)
+        # Opens the results page (by URL or through the search box) and waits for
+        # at least one product before we try to scroll to the bottom
+        self.open_search_results(keyword)
 
     def test_case_TC13(self):
         """Verify we can jump straight to page 3 using the number link."""
@@ -47,8 +53,8 @@ class TestPaginate(BaseCase):
         self.wait_for_element_visible(pagination_bar, timeout=10)
         self.scroll_to_element(pagination_bar)
         
-        # Give it a moment to load any lazy elements at the footer
-        self.sleep(5)
+        # Let any lazy elements at the footer finish loading
+        self.wait_for_page_settled()
         self.save_screenshot("TC13_page1_pagination.png", "Test Case Screenshots")
 
         # Click the link for Page 3
@@ -57,7 +63,7 @@ class TestPaginate(BaseCase):
         self.click(page_3_selector)
         
         # Wait for the page refresh to complete
-        self.sleep(5)
+        self.wait_for_page_settled()
 
         # Confirm the '3' is now the selected/active page in the UI
         self.scroll_to_element(pagination_bar)
@@ -110,7 +116,7 @@ class TestPaginate(BaseCase):
         self.scroll_to_element('a.s-pagination-next')
         self.click('a.s-pagination-next')
         self.wait_for_element_visible('span[aria-label="Page 2"]')
-        self.sleep(5)
+        self.wait_for_page_settled()
 
         # Hit the Previous button
         prev_arrow ='[class*="s-pagination-prev"]'
@@ -120,4 +126,22 @@ class TestPaginate(BaseCase):
         # Confirm we landed back on Page 1
         self.wait_for_element_visible('span[aria-label="Page 1"]', timeout=10)
         self.scroll_to_element(prev_arrow)
-        self.save_screenshot("TC16_prev_page_arrow.png", "Test Case Screenshots")
\ No newline at end of file
+        self.save_screenshot("TC16_prev_page_arrow.png", "Test Case Screenshots")
+
+    def test_case_TC22(self):
+        """Walk the first few result pages at once and check nothing is lost or repeated."""
+        self.perform_search("Bag")
+
+        # Pages 2..N load side by side in background tabs, so this takes about
+        # as long as the slowest page rather than the sum of all of them
+        report = self.walk_pagination()
+
+        # Amazon re-ranks between requests, so a couple of repeats can happen;
+        # a whole page of them means pagination handed back the same results
+        page_size = max(len(p["results"]) for p in report["pages"])
+        if len(report["duplicates"]) >= page_size / 2:
+            self.fail(f"Pages repeat each other: {len(report['duplicates'])} repeated ASINs")
+        if report["missing_asin"]:
+            print(f"Result cards without an ASIN: {report['missing_asin']}")
+        print(f"Walked {len(report['pages'])} pages, "
+              f"{len(report['duplicates'])} repeated products.")
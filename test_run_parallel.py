@@ -0,0 +1,30 @@
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from run_parallel import run_exit_code
+
+
+def test_all_workers_passed():
+    assert run_exit_code([0, 0, 0]) == 0
+
+
+def test_worst_failure_wins():
+    assert run_exit_code([0, 1, 2, 0]) == 2
+
+
+def test_worker_killed_by_signal_fails_the_run():
+    assert run_exit_code([0, -9]) == 1
+    assert run_exit_code([-15, 2]) == 2
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs POSIX signals")
+def test_real_killed_worker_fails_the_run():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    proc.send_signal(signal.SIGKILL)
+    code = proc.wait()
+    assert code == -signal.SIGKILL
+    assert run_exit_code([0, code]) == 1
@@ -1,42 +1,54 @@
-from seleniumbase import BaseCase
+import unittest
 
-class TestSearchFilter(BaseCase):
+import memory_profile
+import settings
+from amazon_base import AmazonBaseCase
+
+class TestSearchFilter(AmazonBaseCase):
     """
     Tests for the search sidebar filters.
     Checking if we can stack multiple criteria (color, size, gender)
     and if the 'Clear' functionality actually resets the results.
     """
 
+    # Page content matters here, so only ads and analytics beacons are blocked
+    block_resources = ("ads", "analytics")
+
+    # The sidebar filters are under test, not the search box, so the
+    # "clothes" results page can be opened straight from its URL
+    deep_link_setup = True
+
     def setUp(self):
         super().setUp()
         print("\n---- RUNNING BEFORE THE TEST ----")
-        self.open("https://www.amazon.com/") 
         self.maximize_window()
+
+        # Deep-linked tests open the results page themselves
+        if self.uses_deep_links():
+            return
+        self.open(self.base_url) 
         
         # Standard check to ensure we aren't looking at a blank white page
         self.wait_for_element_present("body")
         
         # Get rid of that annoying 'Continue shopping' overlay if it pops up
-        self.click_if_visible('button[alt="Continue shopping"]') 
+        self.dismiss_interstitials()
         
         # Make sure the search bar is actually there before we try to type
         self.wait_for_element_visible('input[name="field-keywords"]', timeout=15)
 
     def tearDown(self):         
-        # Housekeeping: wipe the session so the next test doesn't inherit weird states
-        self.clear_local_storage()
-        self.clear_session_storage()
-        self.delete_all_cookies()
+        # Housekeeping: AmazonBaseCase wipes the session so the next test doesn't inherit weird states
         super().tearDown()
         print("---- END OF TEST ----")
 
+    # Stacks filters one after another, so watch memory across the loop
+    @memory_profile.sample_every(3)
     def test_case_TC09(self):
         """Verify we can apply Unisex, Black, and Size M filters all at once."""
         
         # Kick off with a broad search for clothes
-        search_bar = 'input[name="field-keywords"]'
-        self.wait_for_element_visible(search_bar)
-        self.type(search_bar, "clothes\n") 
+        self.open_search_results("clothes")
 
         # I'm putting these in a list so I can loop through them easily.
         # This keeps the main logic from being repetitive.
@@ -62,9 +74,9 @@ class TestSearchFilter(BaseCase):
             # Take a shot after each click so I can track the progress in the logs
             self.save_screenshot(f"TC09_0{i}_Filter_Applied.png", "Test Case Screenshots")
             
-            # Give the AJAX results a second to settle before the next loop
+            # Let the AJAX results settle before the next loop
             self.wait_for_element_present("body")
-            self.sleep(2) 
+            self.wait_for_page_settled()
 
         # Final check: make sure we actually see products in the results area
         self.wait_for_element_visible('div[data-component-type="s-search-result"]', timeout=10)
@@ -76,9 +88,7 @@ class TestSearchFilter(BaseCase):
         """Make sure the 'Clear' link actually appears and resets the search."""
         
         # Start with the same base search
-        search_bar = 'input[name="field-keywords"]'
-        self.wait_for_element_visible(search_bar)
-        self.type(search_bar, "clothes\n") 
+        self.open_search_results("clothes")
 
         # Apply a quick filter just to trigger the 'Clear' option in the UI
         unisex_filter = 'a[aria-label="Apply Unisex filter to narrow results"]'
@@ -105,4 +115,17 @@ class TestSearchFilter(BaseCase):
             self.fail("Clear link was not found after applying filter.")
 
         # Final check of the clean state
-        self.save_screenshot("TC10_02_Filters_Cleared_Final.png", "Test Case Screenshots")
\ No newline at end of file
+        self.save_screenshot("TC10_02_Filters_Cleared_Final.png", "Test Case Screenshots")
+
+    @unittest.skipUnless(settings.FILTER_DEPTH, "set AMZ_FILTER_DEPTH=k to run the filter matrix")
+    def test_case_TC24(self):
+        """Every combination of up to k sidebar filters loads, and Clear resets each one."""
+        self.open_search_results("clothes")
+
+        # The facets are read from the sidebar once and every combination is
+        # opened straight from its URL, a few tabs at a time
+        report = self.run_filter_matrix("clothes")
+        empty = [" + ".join(r["filters"]) for r in report["rows"] if not r["cards"]]
+        if empty:
+            print(f"Combinations with no results: {empty}")
+        self.save_screenshot("TC24_Filter_Matrix_Done.png", "Test Case Screenshots")
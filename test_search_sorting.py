@@ -1,33 +1,35 @@
-from seleniumbase import BaseCase
+import scroll_driver
+import search_results
+from amazon_base import AmazonBaseCase
 
-class TestSearchSorting(BaseCase):
+class TestSearchSorting(AmazonBaseCase):
     """
     Testing the search result sorting logic.
     Main goal is to ensure the site actually reorders items when 
     switching between Low-to-High and High-to-Low price filters.
     """
 
+    # Images stay on: TC11/TC12 scroll to lazy-load them for the screenshots
+    block_resources = ("ads", "analytics")
+
     def setUp(self):
         super().setUp()
         print()
         print("---- RUNNING BEFORE THE TEST ----")
-        self.open("https://www.amazon.com/") 
+        self.open(self.base_url) 
         self.maximize_window()
         
         # Don't start until the body is loaded; better than just a static sleep
         self.wait_for_element_present("body")
         
         # Clean up the view: close the 'Continue shopping' pop-up if it's in the way
-        self.click_if_visible('button[alt="Continue shopping"]') 
+        self.dismiss_interstitials()
         
         # Make sure the search bar is actually interactive before typing
         self.wait_for_element_visible('input[name="field-keywords"]', timeout=15)
 
     def tearDown(self):         
-        # Wipe session data so tests stay independent and clean
-        self.clear_local_storage()
-        self.clear_session_storage()
-        self.delete_all_cookies()
+        # Session data is wiped by AmazonBaseCase so tests stay independent and clean
         super().tearDown()
         print("---- END OF TEST ----")
 
@@ -40,15 +42,14 @@ class TestSearchSorting(BaseCase):
         # Give the results a moment to finish rendering so the dropdown is clickable
         sorting_selector = 'span[data-action="a-dropdown-button"]'
         self.wait_for_element_visible(sorting_selector, timeout=15)
-        self.sleep(5) # Manual buffer for the dynamic sorting element to settle
+        self.wait_for_element_stable(sorting_selector) # The dynamic sorting element has to stop moving first
         
         # Open the sort menu
         self.click(sorting_selector)
-        self.sleep(3)
         
         # Target 'Low to High' specifically; using partial data-value match for stability
         low_to_high = 'a[data-value*="price-asc-rank"]'
-        self.wait_for_element_visible(low_to_high)
+        self.wait_for_element_stable(low_to_high)
         
         # js_click is safer here because Amazon's dropdown overlays can be tricky for Selenium
         self.js_click(low_to_high) 
@@ -57,12 +58,18 @@ class TestSearchSorting(BaseCase):
         self.wait_for_text("Price: Low to High", sorting_selector, timeout=10)
         self.save_screenshot("TC11_LowToHigh_Start.png", "Test Case Screenshots")
         
-        # Scroll down in chunks to trigger lazy-loading for a better screenshot of the items
-        for x in range(0, 2000, 500):
-            self.execute_script(f"window.scrollTo(0, {x});")
-            self.sleep(0.5)
+        # Scroll down to trigger lazy-loading for a better screenshot of the items
+        # (returns once the lazy images in view have actually loaded)
+        stats = self.scroll_in_page(1500)
+        print(f"Results page {scroll_driver.describe(stats)}")
+        if stats["timed_out"]:
+            self.fail("Scrolling the results page used up its whole time budget")
 
         self.save_screenshot("TC11_LowToHigh_Scrolled.png", "Test Case Screenshots")
+
+        # Check the prices really are in order, this page and the next
+        check = self.verify_sort_order("Bag", "price-asc")
+        print(f"Sort check: {search_results.describe(check)}")
         print("Successfully validated 'Price: Low to High' sorting.")
 
     def test_case_TC12(self):
@@ -73,15 +80,14 @@ class TestSearchSorting(BaseCase):
 
         sorting_selector = 'span[data-action="a-dropdown-button"]'
         self.wait_for_element_visible(sorting_selector, timeout=15)
-        self.sleep(5)
+        self.wait_for_element_stable(sorting_selector)
 
         # Trigger the dropdown
         self.click(sorting_selector)
-        self.sleep(5)
         
         # Switch to 'High to Low'
         high_to_low = 'a[data-value*="price-desc-rank"]'
-        self.wait_for_element_visible(high_to_low)
+        self.wait_for_element_stable(high_to_low)
         self.js_click(high_to_low)
 
         # Confirm the label change
@@ -89,9 +95,15 @@ class TestSearchSorting(BaseCase):
         self.save_screenshot("TC12_HighToLow_Start.png", "Test Case Screenshots")
         
         # Defensive scrolling to make sure we load the higher-priced results correctly
-        for x in range(0, 2000, 500):
-            self.execute_script(f"window.scrollTo(0, {x});")
-            self.sleep(0.5)
+        # (returns once the lazy images in view have actually loaded)
+        stats = self.scroll_in_page(1500)
+        print(f"Results page {scroll_driver.describe(stats)}")
+        if stats["timed_out"]:
+            self.fail("Scrolling the results page used up its whole time budget")
 
         self.save_screenshot("TC12_HighToLow_Scrolled.png", "Test Case Screenshots")
+
+        # Check the prices really are in order, this page and the next
+        check = self.verify_sort_order("Bag", "price-desc")
+        print(f"Sort check: {search_results.describe(check)}")
         print("Successfully validated 'Price: High to Low' sorting.")
\ No newline at end of file
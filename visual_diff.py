@@ -0,0 +1,207 @@
+"""
+Visual regression check: baseline screenshots vs the latest run.
+
+Frames are paired by file name (worker sub-folders are searched too) and
+compared as NumPy arrays. Each frame gets a changed-pixel ratio, the share of
+32px blocks that changed, and a structural-similarity (SSIM) score. All three
+are computed with whole-array operations, and SSIM uses integral images for
+its local windows. Masked regions are left out of every metric. Masks come
+from the frame's .mask.json sidecar (ads, prices, ... boxes recorded at
+capture time, see screenshots.py) and from an optional masks file:
+
+    {"*": [[0, 0, 1920, 60]], "TC13_*.png": [[1200, 300, 400, 900]]}
+
+The frames are spread over a process pool. A heatmap is written only for
+frames that fail the thresholds.
+
+Usage (record both runs with AMZ_SCREENSHOT_MASKS=1 to get the sidecars):
+    python visual_diff.py
+    python visual_diff.py --baseline "Test Screenshots" --current "Test Case Screenshots" -j 8
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# A pixel counts as changed when any channel moved by more than this
+PIXEL_TOLERANCE = 24
+BLOCK = 32
+# A block counts as changed when more than this share of its pixels changed
+BLOCK_CHANGED = 0.05
+SSIM_WINDOW = 8
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def find_frames(root):
+    """file name -> path for every .png under root (worker folders included)."""
+    frames = {}
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(".png"):
+                frames.setdefault(name, os.path.join(folder, name))
+    return frames
+
+
+def load_masks(path):
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def boxes_for(name, frame_path, masks):
+    boxes = []
+    for pattern, pattern_boxes in masks.items():
+        if fnmatch.fnmatch(name, pattern):
+            boxes.extend(pattern_boxes)
+    try:
+        with open(frame_path + ".mask.json") as f:
+            boxes.extend(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return boxes
+
+
+def load_rgb(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def mask_array(shape, boxes):
+    """True where pixels are ignored."""
+    mask = np.zeros(shape, dtype=bool)
+    for x, y, w, h in boxes:
+        mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = True
+    return mask
+
+
+def box_mean(a, k):
+    """Mean over every k x k window (valid positions only), via an integral image."""
+    c = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def ssim(gray_a, gray_b, mask):
+    """Mean SSIM over the windows that don't touch a masked pixel."""
+    k = SSIM_WINDOW
+    if min(gray_a.shape) < k:
+        return 1.0
+    mu_a, mu_b = box_mean(gray_a, k), box_mean(gray_b, k)
+    var_a = box_mean(gray_a * gray_a, k) - mu_a ** 2
+    var_b = box_mean(gray_b * gray_b, k) - mu_b ** 2
+    cov = box_mean(gray_a * gray_b, k) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + _C1) * (2 * cov + _C2)) / (
+        (mu_a ** 2 + mu_b ** 2 + _C1) * (var_a + var_b + _C2)
+    )
+    usable = box_mean(mask.astype(np.float64), k) == 0
+    return float(ssim_map[usable].mean()) if usable.any() else 1.0
+
+
+def block_changed(changed, mask):
+    """Share of (unmasked) BLOCK x BLOCK tiles with more than BLOCK_CHANGED changed."""
+    h, w = (changed.shape[0] // BLOCK) * BLOCK, (changed.shape[1] // BLOCK) * BLOCK
+    if not h or not w:
+        return 0.0
+    tiles = (h // BLOCK, BLOCK, w // BLOCK, BLOCK)
+    counted = (~mask[:h, :w]).reshape(tiles).sum(axis=(1, 3))
+    hits = (changed[:h, :w] & ~mask[:h, :w]).reshape(tiles).sum(axis=(1, 3))
+    live = counted > 0
+    if not live.any():
+        return 0.0
+    return float((hits[live] / counted[live] > BLOCK_CHANGED).mean())
+
+
+def heatmap(current, changed, mask, path):
+    """Current frame greyed out, changed pixels in red, masked areas in blue."""
+    gray = current.mean(axis=2, keepdims=True) * 0.5 + 64
+    out = np.repeat(gray, 3, axis=2)
+    out[mask] = out[mask] * 0.5 + np.array([0, 0, 110])
+    out[changed] = [255, 0, 0]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    Image.fromarray(out.clip(0, 255).astype(np.uint8)).save(path)
+
+
+def compare(job):
+    """Worker: compare one frame pair; returns a result dict."""
+    name, baseline_path, current_path, boxes, opts = job
+    a, b = load_rgb(baseline_path), load_rgb(current_path)
+    result = {"name": name, "size_changed": a.shape != b.shape}
+    h, w = min(a.shape[0], b.shape[0]), min(a.shape[1], b.shape[1])
+    a, b = a[:h, :w], b[:h, :w]
+    mask = mask_array((h, w), boxes)
+
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=2)
+    changed = (diff > PIXEL_TOLERANCE) & ~mask
+    live = (~mask).sum()
+    result["changed_ratio"] = float(changed.sum() / live) if live else 0.0
+    result["masked_ratio"] = float(mask.mean())
+    result["blocks_changed"] = block_changed(changed, mask)
+
+    weights = np.array([0.299, 0.587, 0.114])
+    result["ssim"] = ssim(a @ weights, b @ weights, mask)
+
+    result["failed"] = (
+        result["size_changed"]
+        or result["changed_ratio"] > opts["threshold"]
+        or 1 - result["ssim"] > opts["ssim_threshold"]
+    )
+    if result["failed"]:
+        result["heatmap"] = os.path.join(opts["out"], name.replace(".png", ".diff.png"))
+        heatmap(b, changed, mask, result["heatmap"])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Visual diff of baseline vs current screenshots")
+    parser.add_argument("--baseline", default="Test Screenshots")
+    parser.add_argument("--current", default="Test Case Screenshots")
+    parser.add_argument("--masks", default=None, help="JSON file of extra mask boxes")
+    parser.add_argument("--out", default="visual_diff")
+    parser.add_argument("--threshold", type=float, default=0.01,
+                        help="max share of changed (unmasked) pixels")
+    parser.add_argument("--ssim-threshold", type=float, default=0.02,
+                        help="max 1 - SSIM")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    baseline, current = find_frames(args.baseline), find_frames(args.current)
+    masks = load_masks(args.masks)
+    opts = {"threshold": args.threshold, "ssim_threshold": args.ssim_threshold,
+            "out": args.out}
+    jobs = [
+        (name, baseline[name], current[name],
+         boxes_for(name, baseline[name], masks) + boxes_for(name, current[name], {}), opts)
+        for name in sorted(set(baseline) & set(current))
+    ]
+    if not jobs:
+        print("No screenshots in common between baseline and current")
+        return 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(compare, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4))))
+
+    results.sort(key=lambda r: r["changed_ratio"], reverse=True)
+    failed = [r for r in results if r["failed"]]
+    print(f"{'changed':>8} {'blocks':>7} {'ssim':>6}  frame")
+    for r in results:
+        flag = "FAIL " if r["failed"] else ""
+        print(f"{r['changed_ratio']:8.2%} {r['blocks_changed']:7.1%} {r['ssim']:6.3f}  "
+              f"{flag}{r['name']}{' (size changed)' if r['size_changed'] else ''}")
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print(f"Not in this run: {', '.join(missing)}")
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "report.json"), "w") as f:
+        json.dump({"results": results, "missing": missing}, f, indent=2)
+    print(f"{len(failed)} of {len(results)} frames differ; heatmaps in {args.out}/")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
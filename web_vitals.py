@@ -0,0 +1,232 @@
+"""
+Core Web Vitals and Navigation Timing for every page the suite visits.
+
+COLLECTOR_JS is registered with CDP Page.addScriptToEvaluateOnNewDocument, so
+its PerformanceObservers (LCP, layout shifts, long tasks) are running before
+the page's own scripts. Each document is snapshotted when it is hidden
+(pagehide), and the snapshot goes to sessionStorage, which survives the
+navigation. At the end of a test AmazonBaseCase collects the stored snapshots
+plus one for the page that is still open.
+
+Each page becomes one line in a JSONL time series keyed by run, test and page
+type. gate() compares this run's p75 LCP per page type with the baseline and
+reports the page types that got slower. AMZ_VITALS_UPDATE_BASELINE=1 records
+a new baseline instead.
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+import settings
+
+STORE_KEY = "__amz_vitals"
+
+COLLECTOR_JS = """
+(function () {
+    if (window.__amzVitals) { return; }
+    var lcp = null, cls = 0, longTasks = 0, longTaskMs = 0, saved = false;
+    function observe(type, callback) {
+        try {
+            new PerformanceObserver(function (list) { list.getEntries().forEach(callback); })
+                .observe({type: type, buffered: true});
+        } catch (e) {}
+    }
+    observe("largest-contentful-paint", function (e) { lcp = e.startTime; });
+    observe("layout-shift", function (e) { if (!e.hadRecentInput) { cls += e.value; } });
+    observe("longtask", function (e) { longTasks += 1; longTaskMs += e.duration; });
+
+    function snapshot() {
+        var nav = performance.getEntriesByType("navigation")[0] || {};
+        var resources = performance.getEntriesByType("resource");
+        return {
+            url: location.href,
+            lcp_ms: lcp,
+            cls: cls,
+            long_tasks: longTasks,
+            long_task_ms: longTaskMs,
+            ttfb_ms: nav.responseStart || null,
+            dom_content_loaded_ms: nav.domContentLoadedEventEnd || null,
+            load_ms: nav.loadEventEnd || null,
+            resources: resources.length,
+            transfer_bytes: resources.reduce(function (sum, r) {
+                return sum + (r.transferSize || 0);
+            }, nav.transferSize || 0)
+        };
+    }
+    function save() {
+        if (saved || location.protocol.indexOf("http") !== 0) { return; }
+        saved = true;
+        try {
+            var stored = JSON.parse(sessionStorage.getItem("%s") || "[]");
+            stored.push(snapshot());
+            sessionStorage.setItem("%s", JSON.stringify(stored));
+        } catch (e) {}
+    }
+    addEventListener("pagehide", save);
+    window.__amzVitals = {
+        // Taken by the test itself; don't store it again when the page goes away
+        collect: function () { saved = true; return snapshot(); }
+    };
+})();
+""" % (STORE_KEY, STORE_KEY)
+
+# Snapshots of the pages left earlier plus the one still open
+COLLECT_JS = """
+var stored = JSON.parse(sessionStorage.getItem(arguments[0]) || "[]");
+sessionStorage.removeItem(arguments[0]);
+if (window.__amzVitals) { stored.push(window.__amzVitals.collect()); }
+return stored;
+"""
+
+
+def install(driver):
+    """Start collecting in this tab. Returns False without CDP (non-Chromium)."""
+    if getattr(driver, "_vitals_collector", None):
+        return True
+    try:
+        result = driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": COLLECTOR_JS}
+        )
+    except (AttributeError, WebDriverException):
+        return False
+    driver._vitals_collector = result.get("identifier", True)
+    return True
+
+
+def page_type(url):
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    query = parse_qs(parts.query)
+    if path == "/":
+        return "home"
+    if path == "/s":
+        if "rh" in query:
+            return "filtered_results"
+        if query.get("page", ["1"])[0] != "1":
+            return "results_page_n"
+        return "search_results"
+    if "/dp/" in path or path.startswith("/gp/product"):
+        return "product_detail"
+    if path.startswith(("/gp/cart", "/cart")):
+        return "cart"
+    if path.startswith("/customer-preferences"):
+        return "language_settings"
+    if path.startswith(("/b", "/gp/browse")) or "node" in query:
+        return "category"
+    return "other"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def collect(driver):
+    try:
+        return driver.execute_script(COLLECT_JS, STORE_KEY) or []
+    except WebDriverException:
+        return []
+
+
+class VitalsStore:
+    """Appends page records to the JSONL time series and keeps this run's LCPs."""
+
+    def __init__(self, path, baseline_path):
+        self.path = path
+        self.baseline_path = baseline_path
+        self.lcp = defaultdict(list)
+
+    def add(self, test_id, snapshots, fast_mode=False):
+        records = []
+        for snap in snapshots:
+            record = dict(
+                snap, run=settings.RUN_ID, worker=settings.WORKER_ID, test=test_id,
+                page_type=page_type(snap["url"]), fast_mode=fast_mode,
+                at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            )
+            records.append(record)
+            if record["lcp_ms"] is not None:
+                self.lcp[self.key(record)].append(record["lcp_ms"])
+        if records:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # One append per test keeps parallel workers' lines intact
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in records))
+        return records
+
+    def load_run(self, run_id):
+        """Take this run's LCPs from the JSONL file, e.g. in run_parallel.py
+        once every worker has appended its pages."""
+        self.lcp = defaultdict(list)
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("run") == run_id and record.get("lcp_ms") is not None:
+                        self.lcp[self.key(record)].append(record["lcp_ms"])
+        except OSError:
+            pass
+
+    @staticmethod
+    def key(record):
+        # Blocked images change what the largest paint is, so compare like with like
+        return record["page_type"] + (" (fast mode)" if record["fast_mode"] else "")
+
+    def p75(self):
+        return {
+            key: percentile(values, 0.75)
+            for key, values in self.lcp.items()
+            if len(values) >= settings.VITALS_MIN_SAMPLES
+        }
+
+    def load_baseline(self):
+        try:
+            with open(self.baseline_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_baseline(self):
+        baseline = self.load_baseline()
+        baseline.update(self.p75())
+        with open(self.baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+
+    def gate(self):
+        """Page types whose p75 LCP is over baseline * (1 + tolerance)."""
+        baseline = self.load_baseline()
+        failures = []
+        for key, p75 in sorted(self.p75().items()):
+            limit = baseline.get(key)
+            if limit is not None and p75 > limit * (1 + settings.LCP_TOLERANCE):
+                failures.append(
+                    f"{key}: p75 LCP {p75:.0f}ms vs baseline {limit:.0f}ms"
+                )
+        return failures
+
+    def summary_lines(self):
+        if not self.lcp:
+            return []
+        lines = ["LCP by page type (p75):"]
+        for key, values in sorted(self.lcp.items()):
+            lines.append(f"  {key}: {percentile(values, 0.75):.0f}ms over {len(values)} pages")
+        return lines
+
+
+def describe(record):
+    lcp = f"{record['lcp_ms']:.0f}ms" if record["lcp_ms"] is not None else "-"
+    ttfb = f"{record['ttfb_ms']:.0f}ms" if record["ttfb_ms"] else "-"
+    return (f"{record['page_type']}: LCP {lcp}, CLS {record['cls']:.3f}, "
+            f"TTFB {ttfb}, {record['long_tasks']} long tasks, "
+            f"{record['resources']} resources")
+
+
+store = VitalsStore(settings.VITALS_FILE, settings.VITALS_BASELINE_FILE)